@@ -1,6 +1,10 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+from .tokens import RevocableRefreshToken
 
 User = get_user_model()
 
@@ -35,4 +39,45 @@ class RegisterSerializer(serializers.ModelSerializer):
             first_name=validated_data.get('first_name', ''),
             last_name=validated_data.get('last_name', '')
         )
-        return user
\ No newline at end of file
+        return user
+
+class TokenRefreshSerializer(serializers.Serializer):
+    """
+    Refreshes (and with ROTATE_REFRESH_TOKENS, rotates) a refresh token
+    without touching the database: the access token is built from the
+    token's claims instead of reloading the user, and the rotated token
+    is revoked in the cache. Deactivated users' tokens are revoked by
+    accounts.signals.
+    """
+    refresh = serializers.CharField()
+    access = serializers.CharField(read_only=True)
+
+    def validate(self, attrs):
+        try:
+            refresh = RevocableRefreshToken(attrs['refresh'])
+        except TokenError as e:
+            raise InvalidToken(e.args[0])
+
+        data = {'access': str(refresh.access_token)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            # Two requests with the same token can both pass verification;
+            # only the one that revokes it may rotate it
+            if not refresh.revoke():
+                raise InvalidToken(_("Token is revoked"))
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data['refresh'] = str(refresh)
+
+        return data
+
+class LogoutSerializer(serializers.Serializer):
+    refresh = serializers.CharField()
+
+    def validate(self, attrs):
+        try:
+            attrs['token'] = RevocableRefreshToken(attrs['refresh'])
+        except TokenError as e:
+            raise InvalidToken(e.args[0])
+        return attrs
@@ -0,0 +1,13 @@
+from django.conf import settings
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .tokens import revoke_user_tokens
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def revoke_tokens_of_inactive_user(sender, instance, **kwargs):
+    # Token refresh no longer reloads the user, so deactivation has to
+    # revoke the outstanding refresh tokens explicitly
+    if not instance.is_active:
+        revoke_user_tokens(instance.pk)
@@ -0,0 +1,18 @@
+"""Background tasks for the accounts app (run by taskqueue workers)."""
+from django.contrib.auth import get_user_model
+from django.core.mail import send_mail
+
+from taskqueue.registry import task
+
+
+@task(max_attempts=5)
+def send_welcome_email(user_id):
+    user = get_user_model().objects.filter(pk=user_id).first()
+    if user is None:
+        return
+    send_mail(
+        subject="Welcome to Daynova",
+        message=f"Hi {user.first_name or user.email},\n\nThanks for creating an account.",
+        from_email=None,
+        recipient_list=[user.email],
+    )
@@ -1,3 +1,184 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from daynovadev.query_budget import query_budget
+from products.models import Product, ProductSize, ProductVariant
+
+from .models import CustomUser
+from .views import LoginView, LogoutView, RegisterView, TokenRefreshView, UserProfileView
+
+THROTTLE_RATES = {'login_ip': '3/min', 'login_email': '2/min', 'register_ip': '2/hour'}
+
+
+@override_settings(
+    REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': THROTTLE_RATES},
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+)
+class ThrottleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def login(self, email, remote_addr='10.0.0.1', **extra):
+        return self.client.post(
+            '/api/auth/login/', {'email': email, 'password': 'wrong'},
+            content_type='application/json', REMOTE_ADDR=remote_addr, **extra,
+        )
+
+    def test_login_is_limited_per_ip(self):
+        statuses = [self.login(f'user{i}@example.com').status_code for i in range(4)]
+        self.assertEqual(statuses, [401, 401, 401, 429])
+        self.assertIn('Retry-After', self.login('other@example.com'))
+
+    def test_forwarded_for_header_does_not_reset_the_ip_limit(self):
+        statuses = [
+            self.login(f'user{i}@example.com', HTTP_X_FORWARDED_FOR=f'192.0.2.{i}').status_code
+            for i in range(4)
+        ]
+        self.assertEqual(statuses[-1], 429)
+
+    def test_login_is_limited_per_email_across_ips(self):
+        statuses = [
+            self.login('Target@example.com ', remote_addr=f'10.0.1.{i}').status_code
+            for i in range(3)
+        ]
+        self.assertEqual(statuses, [401, 401, 429])
+        # Other accounts are unaffected
+        self.assertEqual(self.login('else@example.com', remote_addr='10.0.2.1').status_code, 401)
+
+    def test_successful_login_counts_against_the_limit(self):
+        CustomUser.objects.create_user(email='a@example.com', password='Sup3rpass!!x')
+        for _ in range(2):
+            response = self.client.post(
+                '/api/auth/login/', {'email': 'a@example.com', 'password': 'Sup3rpass!!x'},
+                content_type='application/json',
+            )
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.login('a@example.com').status_code, 429)
+
+    def test_register_is_limited_per_ip(self):
+        statuses = [
+            self.client.post(
+                '/api/auth/register/',
+                {'email': f'new{i}@example.com', 'password': 'Sup3rpass!!x', 'password2': 'Sup3rpass!!x'},
+                content_type='application/json',
+            ).status_code
+            for i in range(3)
+        ]
+        self.assertEqual(statuses, [201, 201, 429])
+
+    @override_settings(REST_FRAMEWORK={
+        **settings.REST_FRAMEWORK,
+        'DEFAULT_THROTTLE_RATES': {**THROTTLE_RATES, 'login_ip': None, 'login_email': None},
+    })
+    def test_rate_of_none_disables_throttle(self):
+        statuses = {self.login('x@example.com').status_code for _ in range(5)}
+        self.assertEqual(statuses, {401})
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class AuthTestCase(TestCase):
+    email = 'a@example.com'
+    password = 'Sup3rpass!!x'
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user = CustomUser.objects.create_user(email=self.email, password=self.password)
+
+    def login(self):
+        return self.client.post(
+            '/api/auth/login/', {'email': self.email, 'password': self.password},
+            content_type='application/json',
+        )
+
+    def refresh(self, token):
+        return self.client.post('/api/auth/token/refresh/', {'refresh': token}, content_type='application/json')
+
+    def logout(self, token):
+        return self.client.post('/api/auth/logout/', {'refresh': token}, content_type='application/json')
+
+
+class QueryBudgetTests(AuthTestCase):
+    """Each endpoint stays within its view's query_budget."""
+
+    def test_register(self):
+        with query_budget(RegisterView.query_budget):
+            response = self.client.post(
+                '/api/auth/register/',
+                {'email': 'new@example.com', 'password': self.password, 'password2': self.password},
+                content_type='application/json',
+            )
+        self.assertEqual(response.status_code, 201)
+
+    def test_login_merging_a_guest_cart(self):
+        size = ProductSize.objects.create(size_name='Small', size_code='S')
+        for i in range(2):
+            product = Product.objects.create(product_name=f'Watch {i}', base_price=100)
+            variant = ProductVariant.objects.create(product=product, size=size, sku=f'W{i}', stock_quantity=5)
+            self.client.post('/api/cart/', {'variant_id': variant.pk, 'quantity': 1}, content_type='application/json')
+
+        with query_budget(LoginView.query_budget):
+            response = self.login()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.user.cart.items.count(), 2)
+
+    def test_profile(self):
+        auth = {'HTTP_AUTHORIZATION': f"Bearer {self.login().json()['access']}"}
+        with query_budget(UserProfileView.query_budget['get']):
+            response = self.client.get('/api/auth/profile/', **auth)
+        self.assertEqual(response.json()['email'], self.email)
+        with query_budget(UserProfileView.query_budget['put']):
+            response = self.client.put(
+                '/api/auth/profile/', {'first_name': 'Ada'}, content_type='application/json', **auth,
+            )
+        self.assertEqual(response.status_code, 200)
+
+    def test_refresh(self):
+        token = self.login().json()['refresh']
+        with query_budget(TokenRefreshView.query_budget):
+            response = self.refresh(token)
+        self.assertEqual(response.status_code, 200)
+
+    def test_logout(self):
+        token = self.login().json()['refresh']
+        with query_budget(LogoutView.query_budget):
+            response = self.logout(token)
+        self.assertEqual(response.status_code, 205)
+
+
+class RevocationTests(AuthTestCase):
+    def setUp(self):
+        super().setUp()
+        self.token = self.login().json()['refresh']
+
+    def test_logout_revokes_the_refresh_token(self):
+        self.assertEqual(self.logout(self.token).status_code, 205)
+        self.assertEqual(self.refresh(self.token).status_code, 401)
+        self.assertEqual(self.logout(self.token).status_code, 401)
+
+    def test_rotated_refresh_token_cannot_be_reused(self):
+        response = self.refresh(self.token)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.refresh(self.token).status_code, 401)
+        self.assertEqual(self.refresh(response.json()['refresh']).status_code, 200)
+
+    def test_concurrent_refreshes_rotate_the_token_once(self):
+        self.assertEqual(self.refresh(self.token).status_code, 200)
+        # The second request passed the revocation check before the first
+        # one revoked the token
+        with mock.patch.object(cache, 'get_many', return_value={}):
+            self.assertEqual(self.refresh(self.token).status_code, 401)
+
+    def test_deactivation_revokes_refresh_tokens(self):
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.refresh(self.token).status_code, 401)
+
+    def test_other_tokens_stay_valid(self):
+        other = self.login().json()['refresh']
+        self.logout(self.token)
+        self.assertEqual(self.refresh(other).status_code, 200)
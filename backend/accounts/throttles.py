@@ -0,0 +1,90 @@
+import time
+
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class SlidingWindowThrottle(SimpleRateThrottle):
+    """
+    Sliding window rate limit built on two fixed window counters.
+
+    Each request atomically increments the counter of the current window
+    with cache.incr(), and the previous window's count is weighted by how
+    much of it still overlaps the sliding window. Unlike SimpleRateThrottle
+    this needs no read-modify-write of a timestamp list, so concurrent
+    requests cannot race past the limit, and checking costs one or two
+    cache operations.
+    """
+    cache_format = 'throttle_%(scope)s_%(ident)s'
+
+    def get_rate(self):
+        # Read the rates at request time (not import time) so they can be
+        # changed with override_settings; a rate of None disables the throttle.
+        return api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.now = self.timer()
+        window = int(self.now // self.duration)
+        current_key = f'{self.key}_{window}'
+        previous_key = f'{self.key}_{window - 1}'
+
+        # add() is a no-op when the counter exists; it is kept for two
+        # windows because it becomes the previous window next time.
+        self.cache.add(current_key, 0, self.duration * 2)
+        try:
+            current = self.cache.incr(current_key)
+        except ValueError:
+            # The counter expired between add() and incr()
+            self.cache.set(current_key, 1, self.duration * 2)
+            current = 1
+        previous = self.cache.get(previous_key, 0)
+
+        elapsed = self.now - window * self.duration
+        overlap = 1 - elapsed / self.duration
+        return previous * overlap + current <= self.num_requests
+
+    def wait(self):
+        # Time until the previous window stops counting
+        window_start = (self.now // self.duration) * self.duration
+        return max(0.0, window_start + self.duration - self.now)
+
+    def timer(self):
+        return time.time()
+
+
+class IPThrottle(SlidingWindowThrottle):
+    """Limits requests per client IP address."""
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+class LoginIPThrottle(IPThrottle):
+    scope = 'login_ip'
+
+
+class RegisterIPThrottle(IPThrottle):
+    scope = 'register_ip'
+
+
+class LoginEmailThrottle(SlidingWindowThrottle):
+    """
+    Limits login attempts per account, however many addresses the
+    attempts come from.
+    """
+    scope = 'login_email'
+
+    def get_cache_key(self, request, view):
+        email = request.data.get('email')
+        if not email or not isinstance(email, str):
+            return None
+        # Normalise so case variations share a counter, and keep the key
+        # free of characters some cache backends reject
+        ident = email.strip().lower().encode().hex()
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
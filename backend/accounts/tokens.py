@@ -0,0 +1,63 @@
+"""
+Refresh tokens with a cache-backed revocation list.
+
+Revoked token ids (jti) are stored in the cache until the token would
+have expired anyway, so rotation and logout can invalidate tokens
+without the database writes of simplejwt's token_blacklist app. Tokens
+of deactivated users are revoked by recording the time of deactivation
+and rejecting refresh tokens issued before it.
+"""
+from datetime import datetime, timezone
+
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+REVOKED_TOKEN_KEY = 'jwt_revoked_%s'
+REVOKED_USER_KEY = 'jwt_user_revoked_%s'
+
+
+def seconds_until(timestamp):
+    now = datetime.now(timezone.utc).timestamp()
+    return max(1, int(timestamp - now) + 1)
+
+
+def revoke_user_tokens(user_id):
+    """Revoke every refresh token issued to the user so far."""
+    lifetime = api_settings.REFRESH_TOKEN_LIFETIME.total_seconds()
+    revoked_at = int(datetime.now(timezone.utc).timestamp())
+    cache.set(REVOKED_USER_KEY % user_id, revoked_at, int(lifetime) + 1)
+
+
+class RevocableRefreshToken(RefreshToken):
+    """
+    RefreshToken whose verification also consults the cache revocation
+    list. Checking costs a single cache round trip and no queries.
+    """
+    def verify(self):
+        super().verify()
+
+        jti = self.payload[api_settings.JTI_CLAIM]
+        user_id = self.payload.get(api_settings.USER_ID_CLAIM)
+        keys = [REVOKED_TOKEN_KEY % jti, REVOKED_USER_KEY % user_id]
+        revoked = cache.get_many(keys)
+
+        if keys[0] in revoked:
+            raise TokenError(_("Token is revoked"))
+        revoked_at = revoked.get(keys[1])
+        if revoked_at is not None and self.payload.get('iat', 0) <= revoked_at:
+            raise TokenError(_("Token is revoked"))
+
+    def revoke(self):
+        """
+        Revoke this token until it expires. Returns False if it already
+        was revoked; cache.add() is atomic, so of several concurrent calls
+        only one returns True.
+        """
+        return cache.add(
+            REVOKED_TOKEN_KEY % self.payload[api_settings.JTI_CLAIM],
+            True,
+            seconds_until(self.payload['exp']),
+        )
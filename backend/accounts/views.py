@@ -4,17 +4,24 @@ from rest_framework.views import APIView
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from django.contrib.auth import get_user_model, authenticate
 from rest_framework_simplejwt.tokens import RefreshToken
-from .serializers import UserSerializer, RegisterSerializer
+from rest_framework_simplejwt.views import TokenRefreshView as BaseTokenRefreshView
+from cart.session import merge_session_cart
+from .serializers import UserSerializer, RegisterSerializer, TokenRefreshSerializer, LogoutSerializer
+from .tasks import send_welcome_email
+from .throttles import LoginEmailThrottle, LoginIPThrottle, RegisterIPThrottle
 
 User = get_user_model()
 
 class RegisterView(APIView):
     permission_classes = [AllowAny]
+    throttle_classes = [RegisterIPThrottle]
+    query_budget = 4
 
     def post(self, request):
         serializer = RegisterSerializer(data=request.data)
         if serializer.is_valid():
             user = serializer.save()
+            send_welcome_email.enqueue(user.pk, dedup_key=f"welcome-email:{user.pk}")
             
             # Generate tokens
             refresh = RefreshToken.for_user(user)
@@ -28,6 +35,10 @@ class RegisterView(APIView):
 
 class LoginView(APIView):
     permission_classes = [AllowAny]
+    # Throttles run before the handler, so rejected attempts never hash a password
+    throttle_classes = [LoginIPThrottle, LoginEmailThrottle]
+    # User lookup plus the guest cart merge
+    query_budget = 7
 
     def post(self, request):
         email = request.data.get('email')
@@ -37,6 +48,9 @@ class LoginView(APIView):
         user = authenticate(request, username=email, password=password)
         
         if user is not None:
+            # Carry over anything added to the cart before logging in
+            merge_session_cart(request, user)
+
             # Generate tokens
             refresh = RefreshToken.for_user(user)
             
@@ -50,6 +64,7 @@ class LoginView(APIView):
 
 class UserProfileView(APIView):
     permission_classes = [IsAuthenticated]
+    query_budget = {'get': 1, 'put': 2}
     
     def get(self, request):
         serializer = UserSerializer(request.user)
@@ -60,4 +75,24 @@ class UserProfileView(APIView):
         if serializer.is_valid():
             serializer.save()
             return Response(serializer.data)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+class TokenRefreshView(BaseTokenRefreshView):
+    """
+    Issues a new access (and rotated refresh) token. Revocation is checked
+    against the cache, so this endpoint runs no queries.
+    """
+    serializer_class = TokenRefreshSerializer
+    query_budget = 0
+
+class LogoutView(APIView):
+    """Revokes the given refresh token so it can no longer be used."""
+    permission_classes = [AllowAny]
+    query_budget = 0
+
+    def post(self, request):
+        serializer = LogoutSerializer(data=request.data)
+        if serializer.is_valid():
+            serializer.validated_data['token'].revoke()
+            return Response(status=status.HTTP_205_RESET_CONTENT)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
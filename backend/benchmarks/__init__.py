@@ -0,0 +1,9 @@
+"""
+Reproducible performance benchmarks for the API.
+
+Run from the backend directory with ``python -m benchmarks``. A throwaway
+test database is created, filled with synthetic catalog data, measured,
+and destroyed again, and caches are local to the process, so the
+benchmarks never touch real data. See
+``python -m benchmarks --help`` for the options.
+"""
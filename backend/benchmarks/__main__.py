@@ -0,0 +1,172 @@
+"""
+Command line entry point: ``python -m benchmarks [options]``.
+
+Writes the results to a JSON file and, with --compare, reports metrics
+that regressed against an earlier baseline (exiting non-zero if any did).
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+from dataclasses import asdict
+from datetime import datetime, timezone
+
+# Metrics compared against the baseline; lower is better for all but throughput
+COMPARED_METRICS = ('p50_ms', 'p90_ms', 'queries')
+HIGHER_IS_BETTER = ('throughput_rps',)
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description=__doc__)
+    parser.add_argument('--products', type=int, default=500)
+    parser.add_argument('--images-per-product', type=int, default=3)
+    parser.add_argument('--variants-per-product', type=int, default=3)
+    parser.add_argument('--categories', type=int, default=12)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--requests', type=int, default=100,
+                        help="Timed requests per endpoint scenario.")
+    parser.add_argument('--login-requests', type=int, default=10,
+                        help="Timed login requests (each one hashes a password).")
+    parser.add_argument('--repeat', type=int, default=20,
+                        help="Repetitions per microbenchmark.")
+    parser.add_argument('--skip-micro', action='store_true')
+    parser.add_argument('--skip-load', action='store_true')
+    parser.add_argument('-o', '--output', default='benchmark_results.json')
+    parser.add_argument('--compare', metavar='BASELINE',
+                        help="Baseline JSON file to compare the results against.")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="Allowed relative slowdown before a metric counts as a regression.")
+    return parser.parse_args(argv)
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, tolerance):
+    """Return a list of human readable regressions."""
+    regressions = []
+    for section in ('micro', 'load'):
+        for name, metrics in results.get(section, {}).items():
+            before = baseline.get(section, {}).get(name)
+            if not before:
+                continue
+            for metric in COMPARED_METRICS + HIGHER_IS_BETTER:
+                if metric not in metrics or metric not in before or not before[metric]:
+                    continue
+                change = (metrics[metric] - before[metric]) / before[metric]
+                if metric in HIGHER_IS_BETTER:
+                    change = -change
+                # Query counts are exact, so any increase is a regression
+                limit = 0 if metric == 'queries' else tolerance
+                if change > limit:
+                    regressions.append(
+                        f"{section}.{name}.{metric}: {before[metric]:.2f} -> {metrics[metric]:.2f}"
+                    )
+    return regressions
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'daynovadev.settings')
+
+    import django
+    django.setup()
+
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.db import connection
+    from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+    from products.models import Product
+    from .datagen import DatasetSpec, generate_dataset
+    from .load import default_scenarios, run_load
+    from .micro import run_microbenchmarks
+
+    spec = DatasetSpec(
+        products=args.products,
+        images_per_product=args.images_per_product,
+        variants_per_product=args.variants_per_product,
+        categories=args.categories,
+        users=args.users,
+        seed=args.seed,
+    )
+
+    # Repeated logins from one client would otherwise be throttled, and
+    # the benchmark is meant to measure the cost of a real login. The
+    # configured cache is shared with the running site (sessions, carts,
+    # revoked tokens), so the benchmark gets a private one instead.
+    benchmark_settings = override_settings(
+        REST_FRAMEWORK={
+            **settings.REST_FRAMEWORK,
+            'DEFAULT_THROTTLE_RATES': {},
+        },
+        CACHES={
+            'default': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                'LOCATION': 'benchmarks',
+            }
+        },
+    )
+
+    setup_test_environment(debug=False)
+    benchmark_settings.enable()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        dataset = generate_dataset(spec)
+        results = {
+            'revision': git_revision(),
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'database': connection.vendor,
+            'spec': asdict(spec),
+            'dataset': dataset,
+        }
+        if not args.skip_micro:
+            results['micro'] = run_microbenchmarks(repeat=args.repeat)
+        if not args.skip_load:
+            user = get_user_model().objects.order_by('pk').first()
+            product_id = Product.objects.order_by('pk').values_list('pk', flat=True).first()
+            scenarios = default_scenarios(user, args.requests, args.login_requests, product_id)
+            results['load'] = run_load(scenarios, user)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        benchmark_settings.disable()
+        teardown_test_environment()
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+
+    for section in ('micro', 'load'):
+        for name, metrics in results.get(section, {}).items():
+            line = f"{section:5} {name:32} p50 {metrics['p50_ms']:8.2f} ms  p90 {metrics['p90_ms']:8.2f} ms  queries {metrics['queries']}"
+            if 'throughput_rps' in metrics:
+                line += f"  {metrics['throughput_rps']:8.1f} req/s"
+            print(line)
+    print(f"Results written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"Regressions against {args.compare}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print(f"No regressions against {args.compare}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,107 @@
+"""
+Synthetic data generator for benchmarks.
+
+Everything is derived from a seeded random.Random, so the same options
+always produce the same catalog.
+"""
+import random
+from dataclasses import dataclass
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+
+from products.models import (
+    Category, Product, ProductCategory, ProductImage, ProductSize, ProductVariant,
+)
+
+BENCHMARK_PASSWORD = 'bench-Passw0rd!'
+
+SIZES = [
+    ('Small', 'S'),
+    ('Medium', 'M'),
+    ('Large', 'L'),
+    ('Extra Large', 'XL'),
+]
+
+
+@dataclass
+class DatasetSpec:
+    products: int = 500
+    images_per_product: int = 3
+    variants_per_product: int = 3
+    categories: int = 12
+    users: int = 50
+    seed: int = 1
+
+
+def generate_dataset(spec):
+    """Create the catalog and users described by spec using bulk inserts."""
+    rng = random.Random(spec.seed)
+
+    sizes = ProductSize.objects.bulk_create([
+        ProductSize(size_name=name, size_code=code, display_order=order)
+        for order, (name, code) in enumerate(SIZES)
+    ])
+    categories = Category.objects.bulk_create([
+        Category(category_name=f"Category {n}", description=f"Benchmark category {n}")
+        for n in range(spec.categories)
+    ])
+
+    Product.objects.bulk_create([
+        Product(
+            product_name=f"Product {n}",
+            description=f"Benchmark product {n}. " * rng.randint(5, 40),
+            base_price=Decimal(rng.randint(1000, 250000)) / 100,
+        )
+        for n in range(spec.products)
+    ])
+    # Re-read so primary keys are populated on every database backend
+    products = list(Product.objects.order_by('product_id'))
+
+    images = []
+    variants = []
+    product_categories = []
+    for product in products:
+        for n in range(spec.images_per_product):
+            image_type = ['primary', 'secondary'][n] if n < 2 else 'additional'
+            images.append(ProductImage(
+                product=product,
+                image=f"products/bench_{product.pk}_{n}.png",
+                alt_text=f"{product.product_name} image {n}",
+                display_order=n,
+                image_type=image_type,
+            ))
+        for n, size in enumerate(rng.sample(sizes, min(spec.variants_per_product, len(sizes)))):
+            variants.append(ProductVariant(
+                product=product,
+                size=size,
+                sku=f"BENCH-{product.pk}-{size.size_code}",
+                price_adjustment=Decimal(rng.choice([0, 0, 5, 10, 25])),
+                stock_quantity=rng.randint(0, 50),
+                reorder_threshold=rng.randint(0, 10),
+            ))
+        if categories:
+            for category in rng.sample(categories, rng.randint(1, min(2, len(categories)))):
+                product_categories.append(ProductCategory(product=product, category=category))
+
+    ProductImage.objects.bulk_create(images, batch_size=1000)
+    ProductVariant.objects.bulk_create(variants, batch_size=1000)
+    ProductCategory.objects.bulk_create(product_categories, batch_size=1000)
+
+    # Hash once; hashing per user would dominate the setup time
+    password = make_password(BENCHMARK_PASSWORD)
+    User = get_user_model()
+    User.objects.bulk_create([
+        User(email=f"bench{n}@example.com", username=f"bench{n}@example.com", password=password)
+        for n in range(spec.users)
+    ], batch_size=1000)
+
+    return {
+        'products': len(products),
+        'images': len(images),
+        'variants': len(variants),
+        'categories': len(categories),
+        'product_categories': len(product_categories),
+        'users': spec.users,
+    }
@@ -0,0 +1,110 @@
+"""
+In-process load driver: replays requests against the API through the
+full middleware stack with django.test.Client and records throughput,
+latency percentiles and query counts per scenario.
+"""
+import json
+import time
+from dataclasses import dataclass, field
+
+from django.db import connection
+from django.test import Client, override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .datagen import BENCHMARK_PASSWORD
+from .stats import summarize
+
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    path: str
+    data: dict = None
+    authenticated: bool = False
+    requests: int = 100
+    expected_status: int = 200
+    headers: dict = field(default_factory=dict)
+
+
+def default_scenarios(user, requests, login_requests, product_id):
+    return [
+        Scenario('products.list', 'get', '/api/products/', requests=requests),
+        Scenario(
+            'products.list_sparse', 'get',
+            '/api/products/?fields=id,name,price,image,secondaryImage,category',
+            requests=requests,
+        ),
+        Scenario('products.detail', 'get', f'/api/products/{product_id}/', requests=requests),
+        Scenario(
+            'auth.login', 'post', '/api/auth/login/',
+            data={'email': user.email, 'password': BENCHMARK_PASSWORD},
+            requests=login_requests,
+        ),
+        Scenario('auth.profile', 'get', '/api/auth/profile/', authenticated=True, requests=requests),
+    ]
+
+
+class QueryCounter:
+    """
+    Database execute wrapper counting queries. Unlike CaptureQueriesContext
+    it is not affected by connection.queries being reset per request.
+    """
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def send(client, scenario):
+    method = getattr(client, scenario.method)
+    if scenario.data is not None:
+        return method(scenario.path, data=json.dumps(scenario.data),
+                      content_type='application/json', **scenario.headers)
+    return method(scenario.path, **scenario.headers)
+
+
+def run_scenario(scenario, user):
+    client = Client()
+    if scenario.authenticated:
+        token = RefreshToken.for_user(user).access_token
+        scenario.headers['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+
+    # Warm-up request, also used to count queries without skewing timings
+    counter = QueryCounter()
+    with connection.execute_wrapper(counter):
+        response = send(client, scenario)
+    if response.status_code != scenario.expected_status:
+        raise RuntimeError(
+            f"{scenario.name}: expected {scenario.expected_status}, got {response.status_code}"
+        )
+
+    samples = []
+    started = time.perf_counter()
+    for _ in range(scenario.requests):
+        start = time.perf_counter()
+        send(client, scenario)
+        samples.append((time.perf_counter() - start) * 1000)
+    elapsed = time.perf_counter() - started
+
+    result = summarize(samples)
+    result['throughput_rps'] = scenario.requests / elapsed if elapsed else 0.0
+    result['queries'] = counter.count
+    return result
+
+
+def run_load(scenarios, user):
+    results = {}
+    for scenario in scenarios:
+        # Start each scenario from a new, empty cache so runs are comparable
+        cold_cache = override_settings(CACHES={
+            'default': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                'LOCATION': f'benchmarks-{scenario.name}',
+            }
+        })
+        with cold_cache:
+            results[scenario.name] = run_scenario(scenario, user)
+    return results
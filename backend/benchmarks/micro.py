@@ -0,0 +1,54 @@
+"""
+Microbenchmarks for serializers and querysets, run without the HTTP stack.
+"""
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from rest_framework.request import Request
+
+from products.serializers import ProductDetailSerializer, ProductSerializer
+from products.views import ProductViewSet
+
+from .stats import summarize, time_call
+
+
+def viewset_for(action, query_string=''):
+    """Build a ProductViewSet as the router would for the given action."""
+    request = Request(RequestFactory().get(f'/api/products/?{query_string}'))
+    view = ProductViewSet(action=action, request=request, format_kwarg=None, kwargs={})
+    return view
+
+
+def measure(func, repeat):
+    with CaptureQueriesContext(connection) as queries:
+        func()
+    result = summarize(time_call(func, repeat))
+    result['queries'] = len(queries.captured_queries)
+    return result
+
+
+def run_microbenchmarks(repeat=20):
+    results = {}
+
+    list_view = viewset_for('list')
+    results['queryset.list'] = measure(lambda: list(list_view.get_queryset()), repeat)
+
+    sparse_view = viewset_for('list', 'fields=id,name,price,image')
+    results['queryset.list_sparse'] = measure(lambda: list(sparse_view.get_queryset()), repeat)
+
+    products = list(list_view.get_queryset())
+    context = list_view.get_serializer_context()
+    results['serializer.list'] = measure(
+        lambda: ProductSerializer(products, many=True, context=context).data, repeat
+    )
+
+    detail_view = viewset_for('retrieve')
+    detail_context = detail_view.get_serializer_context()
+    product = detail_view.get_queryset().first()
+    if product is not None:
+        def serialize_detail():
+            instance = detail_view.get_queryset().get(pk=product.pk)
+            return ProductDetailSerializer(instance, context=detail_context).data
+        results['serializer.detail_uncached'] = measure(serialize_detail, repeat)
+
+    return results
@@ -0,0 +1,33 @@
+"""Small helpers for summarising timing samples."""
+import statistics
+import time
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of samples."""
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def summarize(samples_ms):
+    return {
+        'count': len(samples_ms),
+        'mean_ms': statistics.fmean(samples_ms) if samples_ms else 0.0,
+        'p50_ms': percentile(samples_ms, 50),
+        'p90_ms': percentile(samples_ms, 90),
+        'p99_ms': percentile(samples_ms, 99),
+        'max_ms': max(samples_ms, default=0.0),
+    }
+
+
+def time_call(func, repeat):
+    """Call func repeat times and return the durations in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
@@ -0,0 +1,14 @@
+from django.contrib import admin
+from .models import Cart, CartItem
+
+class CartItemInline(admin.TabularInline):
+    model = CartItem
+    extra = 0
+    raw_id_fields = ('variant',)
+
+@admin.register(Cart)
+class CartAdmin(admin.ModelAdmin):
+    list_display = ('cart_id', 'user', 'date_updated')
+    list_select_related = ('user',)
+    search_fields = ('user__email',)
+    inlines = [CartItemInline]
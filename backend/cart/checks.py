@@ -0,0 +1,33 @@
+from django.conf import settings
+from django.core.checks import Tags, Warning, register
+
+# Cache backends whose data is private to one process
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Guest carts live in cache-backed sessions, and throttles, token
+    revocation and the catalog caches rely on the same cache, so every
+    process must see the same one.
+    """
+    if settings.DEBUG or settings.SESSION_ENGINE != 'django.contrib.sessions.backends.cache':
+        return []
+    backend = settings.CACHES[settings.SESSION_CACHE_ALIAS]['BACKEND']
+    if backend not in PROCESS_LOCAL_CACHES:
+        return []
+    return [
+        Warning(
+            f"The '{settings.SESSION_CACHE_ALIAS}' cache ({backend}) is not shared between processes.",
+            hint=(
+                "Guest carts, throttle counters and revoked tokens are lost across "
+                "workers and restarts, and catalog caches go stale. Use a shared "
+                "backend such as Redis or Memcached."
+            ),
+            id='cart.W001',
+        )
+    ]
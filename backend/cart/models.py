@@ -0,0 +1,63 @@
+# models.py for cart
+from django.conf import settings
+from django.db import models
+from products.models import ProductVariant
+
+
+class Cart(models.Model):
+    """
+    Represents the persistent shopping cart of an authenticated user.
+    Guest carts live in the session (see cart.session) and are merged
+    into this model when the user logs in.
+    """
+    cart_id = models.AutoField(primary_key=True)
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='cart')
+    date_created = models.DateTimeField(auto_now_add=True)
+    date_updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Cart {self.cart_id}"
+
+    def quantities(self):
+        """Return a {variant_id: quantity} mapping of the cart contents."""
+        return dict(self.items.values_list('variant_id', 'quantity'))
+
+    def add(self, variant_id, quantity):
+        item, created = CartItem.objects.get_or_create(
+            cart=self, variant_id=variant_id, defaults={'quantity': quantity}
+        )
+        if not created:
+            item.quantity = models.F('quantity') + quantity
+            item.save(update_fields=['quantity'])
+
+    def set(self, variant_id, quantity):
+        if quantity <= 0:
+            self.items.filter(variant_id=variant_id).delete()
+        else:
+            CartItem.objects.update_or_create(
+                cart=self, variant_id=variant_id, defaults={'quantity': quantity}
+            )
+
+    def clear(self):
+        self.items.all().delete()
+
+
+class CartItem(models.Model):
+    """
+    Represents a quantity of a specific product variant in a cart.
+    """
+    item_id = models.AutoField(primary_key=True)
+    cart = models.ForeignKey(Cart, on_delete=models.CASCADE, related_name='items')
+    variant = models.ForeignKey(ProductVariant, on_delete=models.CASCADE)
+    quantity = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['cart', 'variant'],
+                name='unique_variant_per_cart'
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.quantity} x variant {self.variant_id}"
@@ -0,0 +1,32 @@
+from rest_framework import serializers
+from products.models import ProductVariant
+
+class CartItemSerializer(serializers.ModelSerializer):
+    """
+    Serializes a variant in the cart. The quantities are passed in the
+    context as a {variant_id: quantity} mapping.
+    """
+    product_id = serializers.IntegerField(source='product.product_id', read_only=True)
+    product_name = serializers.CharField(source='product.product_name', read_only=True)
+    size = serializers.CharField(source='size.size_name', read_only=True)
+    unit_price = serializers.SerializerMethodField()
+    quantity = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ProductVariant
+        fields = ['variant_id', 'sku', 'product_id', 'product_name', 'size', 'unit_price', 'quantity']
+
+    def get_unit_price(self, obj):
+        return float(obj.product.base_price + obj.price_adjustment)
+
+    def get_quantity(self, obj):
+        return self.context['quantities'][obj.variant_id]
+
+class CartUpdateSerializer(serializers.Serializer):
+    variant_id = serializers.IntegerField()
+    quantity = serializers.IntegerField(min_value=0, default=1)
+
+    def validate_variant_id(self, value):
+        if not ProductVariant.objects.filter(pk=value, is_active=True, product__is_active=True).exists():
+            raise serializers.ValidationError("Product variant not found.")
+        return value
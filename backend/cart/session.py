@@ -0,0 +1,91 @@
+"""
+Guest carts stored in the session.
+
+The session engine is cache-backed (see SESSION_ENGINE in settings), so
+adding to a guest cart never writes to the database. The contents are
+moved into the user's persistent Cart by merge_session_cart() on login.
+"""
+from django.db import transaction
+
+from products.models import ProductVariant
+from .models import Cart, CartItem
+
+CART_SESSION_KEY = 'cart'
+
+
+class SessionCart:
+    """
+    A cart kept in request.session as a {variant_id: quantity} mapping.
+    Exposes the same interface as the Cart model so views can use either.
+    """
+    def __init__(self, session):
+        self.session = session
+
+    def quantities(self):
+        # Session data is JSON serialized, so keys come back as strings
+        stored = self.session.get(CART_SESSION_KEY, {})
+        return {int(variant_id): quantity for variant_id, quantity in stored.items()}
+
+    def _store(self, quantities):
+        if quantities:
+            self.session[CART_SESSION_KEY] = {str(k): v for k, v in quantities.items()}
+        else:
+            self.session.pop(CART_SESSION_KEY, None)
+
+    def add(self, variant_id, quantity):
+        quantities = self.quantities()
+        quantities[variant_id] = quantities.get(variant_id, 0) + quantity
+        self._store(quantities)
+
+    def set(self, variant_id, quantity):
+        quantities = self.quantities()
+        if quantity <= 0:
+            quantities.pop(variant_id, None)
+        else:
+            quantities[variant_id] = quantity
+        self._store(quantities)
+
+    def clear(self):
+        self._store({})
+
+
+def merge_session_cart(request, user):
+    """
+    Move the guest cart held in the request's session into the user's
+    persistent cart, adding quantities for variants already present.
+    Does nothing (and touches no tables) when the guest cart is empty.
+    """
+    session_cart = SessionCart(request.session)
+    quantities = session_cart.quantities()
+    if not quantities:
+        return
+
+    # Variants (or their products) may have been removed or deactivated
+    # since they were added
+    valid_ids = set(
+        ProductVariant.objects.filter(pk__in=quantities, is_active=True, product__is_active=True)
+        .values_list('pk', flat=True)
+    )
+    quantities = {k: v for k, v in quantities.items() if k in valid_ids}
+
+    with transaction.atomic():
+        cart, _ = Cart.objects.get_or_create(user=user)
+        existing = {
+            item.variant_id: item
+            for item in cart.items.filter(variant_id__in=quantities)
+        }
+        to_update = []
+        to_create = []
+        for variant_id, quantity in quantities.items():
+            if variant_id in existing:
+                item = existing[variant_id]
+                item.quantity += quantity
+                to_update.append(item)
+            else:
+                to_create.append(CartItem(cart=cart, variant_id=variant_id, quantity=quantity))
+        if to_update:
+            CartItem.objects.bulk_update(to_update, ['quantity'])
+        if to_create:
+            CartItem.objects.bulk_create(to_create)
+
+    session_cart.clear()
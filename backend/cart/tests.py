@@ -0,0 +1,117 @@
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.models import CustomUser
+from daynovadev.query_budget import query_budget
+from products.models import Product, ProductSize, ProductVariant
+
+from .views import CartView
+
+
+class CartQueryBudgetTests(TestCase):
+    """Every cart method stays within CartView.query_budget, for guests and users."""
+    budget = CartView.query_budget
+
+    def setUp(self):
+        sizes = [ProductSize.objects.create(size_name=code, size_code=code) for code in ('S', 'M')]
+        products = [Product.objects.create(product_name=f'Watch {i}', base_price=100) for i in range(2)]
+        self.variants = [
+            ProductVariant.objects.create(
+                product=product, size=size, sku=f'{product.pk}-{size.size_code}', stock_quantity=5,
+            )
+            for product in products
+            for size in sizes
+        ]
+
+    def authenticate(self):
+        user = CustomUser.objects.create_user(email='a@example.com', password='Sup3rpass!!x')
+        return {'HTTP_AUTHORIZATION': f'Bearer {RefreshToken.for_user(user).access_token}'}
+
+    def check_methods(self, **auth):
+        # Fill the cart first, so responses list several items
+        for variant in self.variants[1:]:
+            self.client.post(
+                '/api/cart/', {'variant_id': variant.pk, 'quantity': 1}, content_type='application/json', **auth,
+            )
+        with query_budget(self.budget['get']):
+            response = self.client.get('/api/cart/', **auth)
+        self.assertEqual(response.json()['total_quantity'], 3)
+
+        with query_budget(self.budget['post']):
+            response = self.client.post(
+                '/api/cart/', {'variant_id': self.variants[0].pk, 'quantity': 2},
+                content_type='application/json', **auth,
+            )
+        self.assertEqual(response.json()['total_quantity'], 5)
+
+        with query_budget(self.budget['put']):
+            response = self.client.put(
+                '/api/cart/', {'variant_id': self.variants[0].pk, 'quantity': 1},
+                content_type='application/json', **auth,
+            )
+        self.assertEqual(response.json()['total_quantity'], 4)
+
+        with query_budget(self.budget['delete']):
+            response = self.client.delete('/api/cart/', **auth)
+        self.assertEqual(response.json()['items'], [])
+
+    def test_guest_cart(self):
+        self.check_methods()
+
+    def test_user_cart(self):
+        self.check_methods(**self.authenticate())
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class GuestCartTests(TestCase):
+    def setUp(self):
+        size = ProductSize.objects.create(size_name='Small', size_code='S')
+        self.variants = [
+            ProductVariant.objects.create(
+                product=Product.objects.create(product_name=f'Watch {i}', base_price=100),
+                size=size, sku=f'W{i}', stock_quantity=5,
+            )
+            for i in range(2)
+        ]
+        self.user = CustomUser.objects.create_user(email='a@example.com', password='Sup3rpass!!x')
+
+    def add(self, variant, quantity=1):
+        return self.client.post(
+            '/api/cart/', {'variant_id': variant.pk, 'quantity': quantity}, content_type='application/json',
+        )
+
+    def test_guest_cart_writes_nothing_to_the_database(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.add(self.variants[0]).status_code, 200)
+            self.assertEqual(self.client.get('/api/cart/').json()['total_quantity'], 1)
+        writes = [
+            query['sql'] for query in queries
+            if query['sql'].lstrip().upper().startswith(('INSERT', 'UPDATE', 'DELETE'))
+        ]
+        self.assertEqual(writes, [])
+
+    def test_login_merges_the_guest_cart(self):
+        self.add(self.variants[0], 2)
+        self.add(self.variants[1])
+        response = self.client.post(
+            '/api/auth/login/', {'email': 'a@example.com', 'password': 'Sup3rpass!!x'},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.user.cart.quantities(), {self.variants[0].pk: 2, self.variants[1].pk: 1})
+        # The guest cart is emptied once merged
+        self.assertEqual(self.client.get('/api/cart/').json()['items'], [])
+
+    def test_merge_skips_deactivated_products(self):
+        self.add(self.variants[0])
+        self.add(self.variants[1])
+        product = self.variants[1].product
+        product.is_active = False
+        product.save()
+        self.client.post(
+            '/api/auth/login/', {'email': 'a@example.com', 'password': 'Sup3rpass!!x'},
+            content_type='application/json',
+        )
+        self.assertEqual(self.user.cart.quantities(), {self.variants[0].pk: 1})
@@ -0,0 +1,66 @@
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework.permissions import AllowAny
+from products.models import ProductVariant
+from .models import Cart
+from .serializers import CartItemSerializer, CartUpdateSerializer
+from .session import SessionCart
+
+class CartView(APIView):
+    """
+    The current user's cart. Authenticated users get their persistent
+    cart; anonymous visitors get a guest cart stored in the session.
+    """
+    permission_classes = [AllowAny]
+    query_budget = {'get': 4, 'post': 7, 'put': 7, 'delete': 4}
+
+    def get_cart(self):
+        user = self.request.user
+        if user.is_authenticated:
+            cart, _ = Cart.objects.get_or_create(user=user)
+            return cart
+        return SessionCart(self.request.session)
+
+    def cart_response(self, cart):
+        quantities = cart.quantities()
+        variants = (
+            ProductVariant.objects
+            .filter(pk__in=quantities)
+            .select_related('product', 'size')
+            .order_by('product__product_name', 'size__display_order')
+        )
+        items = CartItemSerializer(variants, many=True, context={'quantities': quantities}).data
+        return Response({
+            'items': items,
+            'total_quantity': sum(item['quantity'] for item in items),
+            'total_price': sum(item['unit_price'] * item['quantity'] for item in items),
+        })
+
+    def get(self, request):
+        return self.cart_response(self.get_cart())
+
+    def post(self, request):
+        """Add a quantity of a variant to the cart."""
+        serializer = CartUpdateSerializer(data=request.data)
+        if serializer.is_valid():
+            cart = self.get_cart()
+            quantity = serializer.validated_data['quantity']
+            if quantity:
+                cart.add(serializer.validated_data['variant_id'], quantity)
+            return self.cart_response(cart)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    def put(self, request):
+        """Set the quantity of a variant in the cart (0 removes it)."""
+        serializer = CartUpdateSerializer(data=request.data)
+        if serializer.is_valid():
+            cart = self.get_cart()
+            cart.set(serializer.validated_data['variant_id'], serializer.validated_data['quantity'])
+            return self.cart_response(cart)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    def delete(self, request):
+        cart = self.get_cart()
+        cart.clear()
+        return self.cart_response(cart)
@@ -2,6 +2,7 @@
 ASGI config for daynova_backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Set DJANGO_STARTUP_PROFILE=1 to print startup timings (see daynovadev.startup).
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
@@ -9,8 +10,8 @@ https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
-
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'daynovadev.settings')
 
+from daynovadev.startup import get_asgi_application  # noqa: E402
+
 application = get_asgi_application()
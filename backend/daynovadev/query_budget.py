@@ -0,0 +1,153 @@
+"""
+Query budgets: catch N+1 queries and query count regressions.
+
+Views declare how many queries a request may run with a ``query_budget``
+attribute, either a number or a dict keyed by viewset action or, for plain
+API views, by lowercase HTTP method::
+
+    class ProductViewSet(viewsets.ReadOnlyModelViewSet):
+        query_budget = {'list': 3, 'retrieve': 6}
+
+    class UserProfileView(APIView):
+        query_budget = {'get': 1, 'put': 2}
+
+QueryBudgetMiddleware checks every request against the budget of the view
+that handled it while DEBUG is on, and also reports identical statements
+repeated within one request. By default problems are logged; set
+QUERY_BUDGET_RAISE = True to turn them into errors.
+
+In tests, wrap code in ``query_budget`` (usable as a context manager or a
+decorator) to assert the same limits directly::
+
+    with query_budget(3):
+        client.get('/api/products/')
+"""
+import logging
+from collections import Counter
+from contextlib import ContextDecorator, ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+# Transaction control statements; some backends send these through the
+# cursor and others don't, so they are left out of the count
+TRANSACTION_STATEMENTS = ('BEGIN', 'COMMIT', 'ROLLBACK', 'SAVEPOINT', 'RELEASE SAVEPOINT')
+
+
+class QueryRecorder:
+    """Database execute wrapper that records the statements it sees."""
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, execute, sql, params, many, context):
+        if not sql.lstrip().upper().startswith(TRANSACTION_STATEMENTS):
+            self.statements.append((sql, repr(params)))
+        return execute(sql, params, many, context)
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def duplicates(self):
+        """Return the statements (with identical parameters) run more than once."""
+        return [
+            (sql, times)
+            for (sql, _), times in Counter(self.statements).items()
+            if times > 1
+        ]
+
+    def problems(self, budget, allow_duplicates=False):
+        problems = []
+        if budget is not None and self.count > budget:
+            problems.append(f"ran {self.count} queries, budget is {budget}")
+        if not allow_duplicates:
+            for sql, times in self.duplicates():
+                problems.append(f"repeated {times} times: {sql}")
+        return problems
+
+    def record(self):
+        """Install the recorder on every database connection."""
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(self))
+        return stack
+
+
+class query_budget(ContextDecorator):
+    """
+    Fail with QueryBudgetExceeded when the wrapped code runs more than
+    max_queries queries, or repeats an identical statement unless
+    allow_duplicates is set.
+    """
+    def __init__(self, max_queries, allow_duplicates=False):
+        self.max_queries = max_queries
+        self.allow_duplicates = allow_duplicates
+
+    def __enter__(self):
+        self.recorder = QueryRecorder()
+        self._stack = self.recorder.record()
+        self._stack.__enter__()
+        return self.recorder
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._stack.__exit__(exc_type, exc_value, traceback)
+        if exc_type is None:
+            problems = self.recorder.problems(self.max_queries, self.allow_duplicates)
+            if problems:
+                raise QueryBudgetExceeded("; ".join(problems))
+        return False
+
+
+def get_view_budget(view_func, request):
+    """Return the query budget declared by a view for this request, or None."""
+    view_class = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+    budget = getattr(view_class, 'query_budget', getattr(view_func, 'query_budget', None))
+    if isinstance(budget, dict):
+        # ViewSet.as_view() records the method -> action mapping on the view
+        method = request.method.lower()
+        actions = getattr(view_func, 'actions', None) or {}
+        return budget.get(actions.get(method, method))
+    return budget
+
+
+class QueryBudgetMiddleware:
+    """
+    DEBUG only: logs (or raises, with QUERY_BUDGET_RAISE) when a request
+    exceeds its view's query budget or repeats an identical statement.
+    """
+    def __init__(self, get_response):
+        if not settings.DEBUG:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        request._query_budget = None
+        request._query_budget_checked = False
+        with recorder.record():
+            response = self.get_response(request)
+
+        if request._query_budget_checked:
+            problems = recorder.problems(request._query_budget)
+            if problems:
+                message = f"{request.method} {request.path}: " + "; ".join(problems)
+                if getattr(settings, 'QUERY_BUDGET_RAISE', False):
+                    raise QueryBudgetExceeded(message)
+                logger.warning(message)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # Only check views in our own apps; the admin and other
+        # third party views have no budgets of their own
+        view_module = getattr(view_func, '__module__', '')
+        request._query_budget = get_view_budget(view_func, request)
+        request._query_budget_checked = not view_module.startswith('django.')
+        return None
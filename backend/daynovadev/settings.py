@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 
 from pathlib import Path
 import os
+import sys
 from datetime import timedelta
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -44,10 +45,13 @@ INSTALLED_APPS = [
     'rest_framework',
     'rest_framework_simplejwt',
     'products',
+    'cart',
+    'taskqueue',
 ]
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
+    'daynovadev.query_budget.QueryBudgetMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -57,6 +61,49 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Views declare a query_budget; while DEBUG is on, requests that exceed it or
+# repeat an identical statement are logged, or raise if this is True.
+QUERY_BUDGET_RAISE = False
+
+# Sessions are kept in the cache so that guest carts and anonymous browsing
+# never write to the django_session table. For small carts the signed cookie
+# engine ('django.contrib.sessions.backends.signed_cookies') also works and
+# needs no server-side storage at all.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cache'
+SESSION_CACHE_ALIAS = 'default'
+
+# The default cache holds sessions (guest carts), throttle counters, revoked
+# refresh tokens and the catalog caches along with their invalidation, so it
+# must be shared by every web and worker process and survive restarts. A
+# per-process cache such as LocMemCache loses carts and revocations and
+# serves stale products; the cart.W001 check warns about one when DEBUG is off.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ.get('REDIS_URL', 'redis://localhost:6379/1'),
+    }
+}
+
+# Tests use a local memory cache, so they don't need Redis and their
+# cache.clear() calls never wipe a development server's sessions, carts,
+# throttle counters and revoked tokens.
+TESTING = sys.argv[1:2] == ['test']
+if TESTING:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+    SILENCED_SYSTEM_CHECKS = ['cart.W001']
+
+# New server processes preload the most requested catalog data before
+# serving (see products.warmup). Detail responses contain absolute image
+# URLs and are cached per base URL, so list the URLs clients use for the API;
+# their hosts must be in ALLOWED_HOSTS.
+CATALOG_WARMUP = True
+CATALOG_WARMUP_PRODUCTS = 50
+CATALOG_WARMUP_BASE_URLS = ['http://localhost:8000/']
+
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:5173",  # Vite's default development port
 ]
@@ -69,7 +116,9 @@ CORS_ALLOWED_ORIGINS = [
 # In development, allow all origins
 CORS_ALLOW_ALL_ORIGINS = True
 
-CORS_ALLOW_ALL_CREDENTIALS = True
+# The SPA sends the session cookie (credentials: 'include') so that guest
+# carts survive until login, when they are merged into the user's cart
+CORS_ALLOW_CREDENTIALS = True
 
 REST_FRAMEWORK = {
     # 'DEFAULT_PERMISSION_CLASSES': [
@@ -80,12 +129,27 @@ REST_FRAMEWORK = {
         'rest_framework.authentication.SessionAuthentication',
         # 'rest_framework.authentication.BasicAuthentication',
     ),
+    # Sliding window limits for the auth endpoints (see accounts.throttles).
+    # Counters live in the default cache, which must be shared between
+    # processes (e.g. Redis or Memcached) in production.
+    'DEFAULT_THROTTLE_RATES': {
+        'login_ip': '20/min',
+        'login_email': '5/min',
+        'register_ip': '10/hour',
+    },
+    # Number of trusted reverse proxies in front of the app. Throttles key on
+    # the client address; with 0 that is REMOTE_ADDR, and X-Forwarded-For
+    # (which clients can set to anything) is ignored. Behind a load balancer,
+    # set this to the number of proxies that append to X-Forwarded-For.
+    'NUM_PROXIES': 0,
 }
 
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=30),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=14),
     'ROTATE_REFRESH_TOKENS': True,
+    # Rotated and logged out tokens are revoked in the cache by
+    # accounts.tokens instead of the database backed token_blacklist app
     'BLACKLIST_AFTER_ROTATION': False,
     'UPDATE_LAST_LOGIN': False,
 
@@ -142,10 +206,21 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 # URL that handles the media served from MEDIA_ROOT
 MEDIA_URL = '/media/'
 
+# Partial chunked image uploads (see products.uploads). Kept outside
+# MEDIA_ROOT so incomplete files are never served.
+CHUNKED_UPLOAD_DIR = os.path.join(BASE_DIR, 'upload_chunks')
+# Pending uploads that receive nothing for this long are discarded
+CHUNKED_UPLOAD_EXPIRY = timedelta(hours=24)
+
 # # Static files (CSS, JavaScript, Images)
 # STATIC_URL = '/static/'
 # STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
+# Outgoing email is sent from background tasks (see taskqueue). In development
+# messages are printed to the console of the run_workers process.
+EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
+DEFAULT_FROM_EMAIL = 'no-reply@daynova.local'
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -167,9 +242,11 @@ AUTH_PASSWORD_VALIDATORS = [
 # Add this to your settings.py file to use the custom user model
 AUTH_USER_MODEL = 'accounts.CustomUser'
 
-# Update the authentication backends to use email-based authentication
+# Update the authentication backends to use email-based authentication.
+# EmailBackend extends ModelBackend and also matches usernames, so listing
+# ModelBackend as well would only hash the password a second time on every
+# failed login.
 AUTHENTICATION_BACKENDS = [
-    'django.contrib.auth.backends.ModelBackend',  # Default backend
     'accounts.backends.EmailBackend',  # Custom email backend
 ]
 
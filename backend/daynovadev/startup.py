@@ -0,0 +1,225 @@
+"""
+Process startup: loading Django, warming caches and, optionally, measuring
+where boot time goes.
+
+wsgi.py and asgi.py build their application with the functions below.
+Besides what Django's own get_wsgi_application() does, they import the
+URLconf up front (Django otherwise does it on the first request) and send
+``application_ready`` so apps can warm their caches before the process
+serves anything (see products.apps). Management commands never load the
+application, so the warm-up doesn't run during migrate and friends.
+
+Set DJANGO_STARTUP_PROFILE=1 to print a breakdown of startup time to
+stderr: settings, the import, import_models() and ready() time of each app
+in INSTALLED_APPS, URLconf construction, warm-up, and the latency of the
+first request the process serves. Time spent importing a module is counted
+against whichever app imported it first.
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+import django
+from django.apps import AppConfig
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connections
+from django.dispatch import Signal
+from django.urls import get_resolver
+
+PROFILE_ENV_VAR = 'DJANGO_STARTUP_PROFILE'
+
+# Sent once Django and the URLconf are loaded in a server process, before
+# the first request is handled
+application_ready = Signal()
+
+
+def profiling_enabled():
+    return os.environ.get(PROFILE_ENV_VAR, '').lower() in ('1', 'true', 'yes')
+
+
+class StartupProfile:
+    """Startup timings of this process. Records nothing unless enabled."""
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.started = time.perf_counter()
+        self.phases = []
+        self.apps = {}
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            if self.enabled:
+                self.phases.append((name, time.perf_counter() - start))
+
+    @contextmanager
+    def app_loading(self):
+        """Time the import, import_models() and ready() of each installed app."""
+        if not self.enabled:
+            yield
+            return
+
+        original_create = AppConfig.__dict__['create']
+        app_configs = []
+
+        def timed(entry, step, method):
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return method(*args, **kwargs)
+                finally:
+                    self.apps[entry][step] = time.perf_counter() - start
+            return wrapper
+
+        def create(cls, entry):
+            start = time.perf_counter()
+            app_config = original_create.__func__(cls, entry)
+            self.apps[entry] = {'import': time.perf_counter() - start}
+            app_config.import_models = timed(entry, 'models', app_config.import_models)
+            app_config.ready = timed(entry, 'ready', app_config.ready)
+            app_configs.append(app_config)
+            return app_config
+
+        AppConfig.create = classmethod(create)
+        try:
+            with self.phase('apps'):
+                yield
+        finally:
+            AppConfig.create = original_create
+            for app_config in app_configs:
+                del app_config.import_models, app_config.ready
+
+    def report(self):
+        lines = [f"Startup profile (pid {os.getpid()}):"]
+        for name, seconds in self.phases:
+            lines.append(f"  {name:<40}{seconds * 1000:>9.1f} ms")
+            if name == 'apps':
+                for entry, steps in self.apps.items():
+                    lines.append(f"    {entry:<38}" + "".join(
+                        f"{step} {steps.get(step, 0) * 1000:7.1f}  "
+                        for step in ('import', 'models', 'ready')
+                    ).rstrip())
+        lines.append(f"  {'total':<40}{self.elapsed() * 1000:>9.1f} ms")
+        self.write(lines)
+
+    def report_first_request(self, method, path, seconds):
+        self.write([
+            f"First request (pid {os.getpid()}): {method} {path} took "
+            f"{seconds * 1000:.1f} ms, {self.elapsed():.2f} s after startup began"
+        ])
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def write(self, lines):
+        sys.stderr.write("\n".join(lines) + "\n")
+        sys.stderr.flush()
+
+
+class FirstRequestTimer:
+    """WSGI middleware that reports how long the first request took."""
+    def __init__(self, application, profile):
+        self.application = application
+        self.profile = profile
+        self.pending = True
+
+    def __call__(self, environ, start_response):
+        if not self.pending:
+            return self.application(environ, start_response)
+        self.pending = False
+        start = time.perf_counter()
+        try:
+            return self.application(environ, start_response)
+        finally:
+            self.profile.report_first_request(
+                environ.get('REQUEST_METHOD'), environ.get('PATH_INFO'),
+                time.perf_counter() - start,
+            )
+
+
+class AsyncFirstRequestTimer(FirstRequestTimer):
+    """ASGI version of FirstRequestTimer."""
+    async def __call__(self, scope, receive, send):
+        if not self.pending or scope['type'] != 'http':
+            return await self.application(scope, receive, send)
+        self.pending = False
+        start = time.perf_counter()
+        try:
+            return await self.application(scope, receive, send)
+        finally:
+            self.profile.report_first_request(
+                scope.get('method'), scope.get('path'), time.perf_counter() - start,
+            )
+
+
+def load_urlconf():
+    """Import the URLconf and build its reverse lookup tables."""
+    # Built on first access, which imports the URLconf and the routers in it
+    return get_resolver().reverse_dict
+
+
+def setup(profile):
+    with profile.phase('settings'):
+        # Reading any setting imports the settings module
+        settings.INSTALLED_APPS
+    with profile.app_loading():
+        django.setup(set_prefix=False)
+    with profile.phase('urlconf'):
+        load_urlconf()
+
+
+def warm_up(application):
+    # A failed warm-up only means a cold cache, so errors are logged (by
+    # send_robust) rather than stopping the process
+    application_ready.send_robust(sender=application.__class__)
+    # Don't carry connections opened here into forked workers
+    connections.close_all()
+
+
+def send_application_ready(profile, application):
+    with profile.phase('warm-up'):
+        try:
+            in_event_loop = asyncio.get_running_loop() is not None
+        except RuntimeError:
+            in_event_loop = False
+        if in_event_loop:
+            # Some ASGI servers load the application inside their event
+            # loop, where Django doesn't allow database access
+            thread = threading.Thread(target=warm_up, args=(application,))
+            thread.start()
+            thread.join()
+        else:
+            warm_up(application)
+
+
+def get_wsgi_application():
+    """Drop-in replacement for django.core.wsgi.get_wsgi_application()."""
+    profile = StartupProfile(profiling_enabled())
+    setup(profile)
+    with profile.phase('handler'):
+        application = WSGIHandler()
+    send_application_ready(profile, application)
+    if not profile.enabled:
+        return application
+    profile.report()
+    return FirstRequestTimer(application, profile)
+
+
+def get_asgi_application():
+    """Drop-in replacement for django.core.asgi.get_asgi_application()."""
+    profile = StartupProfile(profiling_enabled())
+    setup(profile)
+    with profile.phase('handler'):
+        application = ASGIHandler()
+    send_application_ready(profile, application)
+    if not profile.enabled:
+        return application
+    profile.report()
+    return AsyncFirstRequestTimer(application, profile)
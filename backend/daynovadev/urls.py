@@ -15,16 +15,24 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
 from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import path, include
+from products.media import serve_hashed_media
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    # Content-hashed media, cacheable forever (see products.media)
+    re_path(
+        r'^%sv/(?P<content_hash>[0-9a-f]+)/(?P<path>.+)$' % settings.MEDIA_URL.lstrip('/'),
+        serve_hashed_media,
+        name='hashed-media',
+    ),
     path('', include('products.urls')),
     path('api/auth/', include('accounts.urls')),
+    path('api/cart/', include('cart.urls')),
 ]
 
 
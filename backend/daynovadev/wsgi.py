@@ -2,6 +2,7 @@
 WSGI config for daynova_backend project.
 
 It exposes the WSGI callable as a module-level variable named ``application``.
+Set DJANGO_STARTUP_PROFILE=1 to print startup timings (see daynovadev.startup).
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/wsgi/
@@ -9,8 +10,8 @@ https://docs.djangoproject.com/en/5.1/howto/deployment/wsgi/
 
 import os
 
-from django.core.wsgi import get_wsgi_application
-
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'daynovadev.settings')
 
+from daynovadev.startup import get_wsgi_application  # noqa: E402
+
 application = get_wsgi_application()
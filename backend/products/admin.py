@@ -1,6 +1,9 @@
 from django.contrib import admin
+from django.db.models import Exists, OuterRef
+from django.urls import path
 from django.utils.html import format_html
 from .models import Product, ProductImage, ProductSize, ProductVariant, Category, ProductCategory, ProductGroup, ProductGroupMember
+from .reports import low_stock_csv_response
 
 class ProductImageInline(admin.TabularInline):
     model = ProductImage
@@ -20,21 +23,29 @@ class ProductAdmin(admin.ModelAdmin):
     list_filter = ('is_active',)
     search_fields = ('product_name', 'description')
     inlines = [ProductImageInline]
+
+    def get_queryset(self, request):
+        # Annotate the image flags so the changelist doesn't query per row
+        queryset = super().get_queryset(request)
+        images = ProductImage.objects.filter(product=OuterRef('pk'))
+        return queryset.annotate(
+            _has_primary_image=Exists(images.filter(image_type='primary')),
+            _has_secondary_image=Exists(images.filter(image_type='secondary')),
+        )
     
     def has_primary_image(self, obj):
-        has_primary = obj.images.filter(image_type='primary').exists()
-        return format_html('✅' if has_primary else '❌')
+        return format_html('✅' if obj._has_primary_image else '❌')
     has_primary_image.short_description = 'Primary Image'
 
     def has_secondary_image(self, obj):
-        has_secondary = obj.images.filter(image_type='secondary').exists()
-        return format_html('✅' if has_secondary else '❌')
+        return format_html('✅' if obj._has_secondary_image else '❌')
     has_secondary_image.short_description = 'Secondary Image'
 
 @admin.register(ProductImage)
 class ProductImageAdmin(admin.ModelAdmin):
     list_display = ('product', 'image_preview', 'image_type', 'display_order')
     list_filter = ('image_type', 'product')
+    list_select_related = ('product',)
     
     def image_preview(self, obj):
         if obj.image:
@@ -42,10 +53,48 @@ class ProductImageAdmin(admin.ModelAdmin):
         return "No image"
     image_preview.short_description = 'Preview'
 
+class LowStockFilter(admin.SimpleListFilter):
+    title = 'stock level'
+    parameter_name = 'stock'
+
+    def lookups(self, request, model_admin):
+        return (('low', 'At or below reorder threshold'),)
+
+    def queryset(self, request, queryset):
+        if self.value() == 'low':
+            return queryset.low_stock()
+        return queryset
+
+@admin.register(ProductVariant)
+class ProductVariantAdmin(admin.ModelAdmin):
+    list_display = ('sku', 'product', 'size', 'stock_quantity', 'reorder_threshold', 'is_active')
+    list_filter = (LowStockFilter, 'is_active', 'size')
+    list_select_related = ('product', 'size')
+    search_fields = ('sku', 'product__product_name')
+
+    def get_urls(self):
+        urls = [
+            path(
+                'low-stock-report/',
+                self.admin_site.admin_view(self.low_stock_report_view),
+                name='products_productvariant_low_stock_report',
+            ),
+        ]
+        return urls + super().get_urls()
+
+    def low_stock_report_view(self, request):
+        """Stream the low stock report as a CSV download."""
+        return low_stock_csv_response()
+
 # Register other models
 admin.site.register(ProductSize)
-admin.site.register(ProductVariant)
 admin.site.register(Category)
-admin.site.register(ProductCategory)
 admin.site.register(ProductGroup)
-admin.site.register(ProductGroupMember)
\ No newline at end of file
+
+@admin.register(ProductCategory)
+class ProductCategoryAdmin(admin.ModelAdmin):
+    list_select_related = ('product', 'category')
+
+@admin.register(ProductGroupMember)
+class ProductGroupMemberAdmin(admin.ModelAdmin):
+    list_select_related = ('product', 'group')
\ No newline at end of file
@@ -4,3 +4,13 @@ from django.apps import AppConfig
 class ProductsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'products'
+
+    def ready(self):
+        # Connect the cache invalidation signal handlers
+        from . import checks, signals  # noqa: F401
+
+        # Warm the catalog cache once the application is loaded; querying
+        # here would also run for management commands such as migrate
+        from daynovadev.startup import application_ready
+        from .warmup import warm_catalog_cache
+        application_ready.connect(warm_catalog_cache, dispatch_uid='products.warm_catalog_cache')
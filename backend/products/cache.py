@@ -0,0 +1,142 @@
+"""
+Caching of serialized product data.
+
+Entries are invalidated from model signals (see products.signals) rather
+than expiring on a short timeout, so cached data is never stale after an
+edit made through the ORM. This relies on every process sharing the cache
+(see CACHES in settings). QuerySet.update() bypasses signals; call the
+invalidate functions directly after bulk updates.
+
+Invalidation bumps a version that is part of the entry's key. Callers read
+the version before building an entry and store it under that version, so
+a change made while an entry is being built is never lost. The signals
+bump versions once the change is committed; until then other connections
+still read the old rows.
+"""
+import hashlib
+import json
+import time
+
+from django.core.cache import cache
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+DETAIL_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def cache_is_shared():
+    """Whether other processes (web and task workers) see this process's cache."""
+    return not isinstance(cache, (LocMemCache, DummyCache))
+
+
+def get_version(key):
+    version = cache.get(key)
+    if version is None:
+        # Start from the clock rather than 1, so a version that was evicted
+        # never comes back with the value of entries built before a change
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), None)
+
+
+def detail_version(product_id):
+    return get_version(f"products:detail_version:{product_id}")
+
+
+def detail_cache_key(product_id, version):
+    return f"products:detail:{product_id}:{version}"
+
+
+def get_cached_detail(product_id, base_url, version):
+    """
+    Return the cached representation of a product, or None.
+    Image URLs are absolute, so entries are stored per base URL.
+    """
+    entry = cache.get(detail_cache_key(product_id, version))
+    if entry:
+        return entry.get(base_url)
+    return None
+
+
+def set_cached_detail(product_id, base_url, data, version):
+    key = detail_cache_key(product_id, version)
+    entry = cache.get(key) or {}
+    entry[base_url] = data
+    cache.set(key, entry, DETAIL_CACHE_TIMEOUT)
+
+
+def invalidate_product_details(product_ids):
+    for product_id in set(product_ids):
+        bump_version(f"products:detail_version:{product_id}")
+
+
+# Facets depend on the whole catalog, so their cache keys include a
+# catalog version that is bumped on every relevant change instead of
+# tracking which filter combinations a change affects.
+FACETS_CACHE_TIMEOUT = 60 * 10
+CATALOG_VERSION_KEY = 'products:catalog_version'
+
+
+def catalog_version():
+    return get_version(CATALOG_VERSION_KEY)
+
+
+def bump_catalog_version():
+    bump_version(CATALOG_VERSION_KEY)
+
+
+def facets_cache_key(params, version):
+    """Cache key for a combination of filter parameters (a dict)."""
+    digest = hashlib.sha256(
+        json.dumps(params, sort_keys=True).encode()
+    ).hexdigest()[:32]
+    return f"products:facets:{version}:{digest}"
+
+
+def get_cached_facets(params, version):
+    return cache.get(facets_cache_key(params, version))
+
+
+def set_cached_facets(params, data, version):
+    cache.set(facets_cache_key(params, version), data, FACETS_CACHE_TIMEOUT)
+
+
+# Featured groups (see ProductViewSet.featured) are versioned the same way,
+# since moving a member or editing a product can affect any group.
+FEATURED_CACHE_TIMEOUT = 60 * 60 * 24
+FEATURED_VERSION_KEY = 'products:featured_version'
+
+
+def featured_version():
+    return get_version(FEATURED_VERSION_KEY)
+
+
+def bump_featured_version():
+    bump_version(FEATURED_VERSION_KEY)
+
+
+def featured_cache_key(group_name, version):
+    digest = hashlib.sha256(group_name.encode()).hexdigest()[:32]
+    return f"products:featured:{version}:{digest}"
+
+
+def get_cached_featured(group_name, base_url, version):
+    """Return the cached featured group, or None. Stored per base URL."""
+    entry = cache.get(featured_cache_key(group_name, version))
+    if entry:
+        return entry.get(base_url)
+    return None
+
+
+def set_cached_featured(group_name, base_url, data, version):
+    key = featured_cache_key(group_name, version)
+    entry = cache.get(key) or {}
+    entry[base_url] = data
+    cache.set(key, entry, FEATURED_CACHE_TIMEOUT)
@@ -0,0 +1,16 @@
+from django.core.checks import Tags, Warning, register
+
+
+@register(Tags.caches)
+def check_warmup_base_urls(app_configs, **kwargs):
+    # Imported here: the warm-up module imports the views
+    from .warmup import disallowed_base_urls
+
+    return [
+        Warning(
+            f"CATALOG_WARMUP_BASE_URLS contains {base_url}, whose host is not in ALLOWED_HOSTS.",
+            hint="Cache warm-up and featured group refreshes skip it. Fix the URL or ALLOWED_HOSTS.",
+            id='products.W001',
+        )
+        for base_url in disallowed_base_urls()
+    ]
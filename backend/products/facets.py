@@ -0,0 +1,90 @@
+"""
+Facet counts for the store filters, computed with SQL aggregation.
+"""
+from django.db.models import Count, DecimalField, F, IntegerField, Max, Min, Q, Value
+from django.db.models.functions import Cast, Floor, Least
+
+from .models import Category
+
+DEFAULT_BUCKETS = 10
+MAX_BUCKETS = 50
+
+
+def price_stats(queryset):
+    return queryset.aggregate(
+        count=Count('product_id'),
+        min_price=Min('base_price'),
+        max_price=Max('base_price'),
+    )
+
+
+def price_histogram(queryset, min_price, max_price, buckets):
+    """
+    Split [min_price, max_price] into equal width buckets and count the
+    products in each with one grouped query. Empty buckets are included.
+    """
+    if min_price is None:
+        return []
+    width = (max_price - min_price) / buckets
+    if width == 0:
+        return [{'min': float(min_price), 'max': float(max_price), 'count': queryset.count()}]
+
+    bucket = Least(
+        Cast(
+            Floor(
+                (F('base_price') - Value(min_price)) / Value(width),
+                output_field=DecimalField(max_digits=20, decimal_places=6),
+            ),
+            IntegerField(),
+        ),
+        Value(buckets - 1),
+    )
+    counts = dict(
+        queryset.order_by()
+        .annotate(bucket=bucket)
+        .values('bucket')
+        .annotate(count=Count('product_id'))
+        .values_list('bucket', 'count')
+    )
+    return [
+        {
+            'min': round(float(min_price + width * n), 2),
+            'max': round(float(min_price + width * (n + 1)), 2),
+            'count': counts.get(n, 0),
+        }
+        for n in range(buckets)
+    ]
+
+
+def category_counts(queryset):
+    """Number of products in each active category, for the given products."""
+    return [
+        {'id': category.category_id, 'name': category.category_name, 'count': category.product_count}
+        for category in Category.objects.filter(is_active=True).annotate(
+            product_count=Count(
+                'productcategory__product',
+                filter=Q(productcategory__product__in=queryset.order_by().values('product_id')),
+                distinct=True,
+            )
+        ).filter(product_count__gt=0).order_by('category_name')
+    ]
+
+
+def compute_facets(queryset, category_queryset, buckets=DEFAULT_BUCKETS):
+    """
+    Build the facets for a filtered product queryset. Category counts use
+    category_queryset, which is the same selection without the category
+    filter so that the other categories still show how many products they
+    would match.
+    """
+    stats = price_stats(queryset)
+    min_price, max_price = stats['min_price'], stats['max_price']
+    return {
+        'count': stats['count'],
+        'price': {
+            'min': float(min_price) if min_price is not None else None,
+            'max': float(max_price) if max_price is not None else None,
+            'histogram': price_histogram(queryset, min_price, max_price, buckets),
+        },
+        'categories': category_counts(category_queryset),
+    }
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from products.reports import iter_low_stock_csv
+
+
+class Command(BaseCommand):
+    help = "Write the low stock reorder report as CSV to stdout or a file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('-o', '--output', help="Path of the CSV file to write (defaults to stdout).")
+
+    def handle(self, *args, **options):
+        output = options['output']
+        if output:
+            with open(output, 'w', newline='') as f:
+                f.writelines(iter_low_stock_csv())
+            self.stdout.write(self.style.SUCCESS(f"Low stock report written to {output}"))
+        else:
+            for line in iter_low_stock_csv():
+                self.stdout.write(line, ending='')
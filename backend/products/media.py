@@ -0,0 +1,166 @@
+"""
+Content-hashed media URLs.
+
+Product images are served from /media/v/<hash>/<path>, where the hash is
+taken from the file contents when the image is saved. A changed image gets
+a new URL, so responses can be cached forever (Cache-Control: immutable)
+and updates never require a cache purge. The view below handles conditional
+and range requests, and only serves a file under its current hash, so an
+old URL can never pin new bytes (or a new URL old ones) in a cache for a
+year. A web server or CDN in front should cache these responses rather than
+serve MEDIA_ROOT directly under this scheme.
+
+Replaced and deleted images are removed from storage along with their
+resized renditions (see ProductImage.save and products.signals).
+"""
+import hashlib
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils._os import safe_join
+from django.views.decorators.http import require_safe
+
+HASH_LENGTH = 16
+CACHE_CONTROL = 'public, max-age=31536000, immutable'
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+
+# Widths of the resized copies generated for each product image
+RENDITION_WIDTHS = (400, 800)
+
+
+def rendition_name(image_name, width):
+    """Storage path of the resized copy of image_name at the given width."""
+    directory, filename = os.path.split(image_name)
+    stem, ext = os.path.splitext(filename)
+    return os.path.join(directory, 'renditions', f"{stem}_{width}w{ext}")
+
+
+def delete_image_files(name, storage=default_storage):
+    """Delete a stored image and its renditions."""
+    for file_name in [name, *(rendition_name(name, width) for width in RENDITION_WIDTHS)]:
+        if storage.exists(file_name):
+            storage.delete(file_name)
+
+
+def is_current_hash(path, content_hash):
+    """Whether content_hash is the current hash of the image (or rendition) at path."""
+    # Imported here since the models import this module
+    from .models import ProductImage
+
+    names = ProductImage.objects.filter(content_hash=content_hash).values_list('image', flat=True)
+    return any(
+        path == name or path in (rendition_name(name, width) for width in RENDITION_WIDTHS)
+        for name in names
+    )
+
+
+def compute_file_hash(field_file):
+    """Hash a file in chunks without loading it into memory."""
+    digest = hashlib.sha256()
+    try:
+        for chunk in field_file.chunks():
+            digest.update(chunk)
+    except (FileNotFoundError, ValueError):
+        return None
+    return digest.hexdigest()[:HASH_LENGTH]
+
+
+def hashed_media_url(field_file, content_hash):
+    """Return the versioned URL of a stored file, or its plain URL without a hash."""
+    return hashed_file_url(field_file.storage, field_file.name, content_hash)
+
+
+def hashed_file_url(storage, name, content_hash):
+    """Like hashed_media_url for a file name, e.g. a rendition of an image."""
+    if not content_hash:
+        return storage.url(name)
+    return f"{settings.MEDIA_URL}v/{content_hash}/{name}"
+
+
+def parse_range(header, size):
+    """
+    Parse a single byte range. Returns (start, end) inclusive, None if the
+    header should be ignored, or raises ValueError if it is unsatisfiable.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        # Malformed and multi-range requests get the whole file
+        return None
+    first, last = match.groups()
+    if first and last and int(last) < int(first):
+        # Not a valid range at all, so it is ignored (RFC 9110, 14.1.1)
+        return None
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        # Suffix range: the last N bytes
+        start = max(0, size - int(last))
+        end = size - 1
+    if start >= size or start > end:
+        raise ValueError("Unsatisfiable range")
+    return start, end
+
+
+def iter_file_range(f, start, length):
+    with f:
+        f.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+@require_safe
+def serve_hashed_media(request, content_hash, path):
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    if not os.path.isfile(full_path) or not is_current_hash(path, content_hash):
+        raise Http404
+
+    etag = f'"{content_hash}"'
+    if etag in request.headers.get('If-None-Match', ''):
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        response['Cache-Control'] = CACHE_CONTROL
+        return response
+
+    size = os.path.getsize(full_path)
+    byte_range = None
+    range_header = request.headers.get('Range')
+    # If-Range: only honour the range if the client has this version
+    if range_header and request.headers.get('If-Range', etag) == etag:
+        try:
+            byte_range = parse_range(range_header, size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+    f = open(full_path, 'rb')
+    if byte_range is None:
+        response = FileResponse(f)
+    else:
+        start, end = byte_range
+        content_type = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+        response = StreamingHttpResponse(
+            iter_file_range(f, start, end - start + 1), status=206, content_type=content_type
+        )
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = str(end - start + 1)
+
+    response['ETag'] = etag
+    response['Cache-Control'] = CACHE_CONTROL
+    response['Accept-Ranges'] = 'bytes'
+    return response
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.7 on 2026-10-19 12:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0002_remove_productimage_is_primary_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='productvariant',
+            index=models.Index(condition=models.Q(('is_active', True), ('stock_quantity__lte', models.F('reorder_threshold'))), fields=['product', 'size'], name='low_stock_variant_idx'),
+        ),
+    ]
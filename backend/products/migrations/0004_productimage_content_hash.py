@@ -0,0 +1,34 @@
+# Generated by Django 5.1.7 on 2026-10-19 12:47
+
+import hashlib
+
+from django.db import migrations, models
+
+
+def backfill_content_hashes(apps, schema_editor):
+    ProductImage = apps.get_model('products', 'ProductImage')
+    for product_image in ProductImage.objects.exclude(image='').exclude(image__isnull=True).iterator():
+        digest = hashlib.sha256()
+        try:
+            for chunk in product_image.image.chunks():
+                digest.update(chunk)
+        except (FileNotFoundError, ValueError):
+            continue
+        product_image.content_hash = digest.hexdigest()[:16]
+        product_image.save(update_fields=['content_hash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0003_productvariant_low_stock_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productimage',
+            name='content_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True),
+        ),
+        migrations.RunPython(backfill_content_hashes, migrations.RunPython.noop),
+    ]
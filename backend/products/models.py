@@ -1,5 +1,11 @@
 # models.py for products
-from django.db import models
+import uuid
+
+from functools import partial
+
+from django.conf import settings
+from django.db import models, transaction
+from .media import compute_file_hash, delete_image_files
 
 
 class Product(models.Model):
@@ -42,6 +48,10 @@ class ProductImage(models.Model):
         choices=IMAGE_TYPE_CHOICES, 
         default='additional'
     )
+    # Short hash of the file contents, used to version the image URL
+    content_hash = models.CharField(max_length=64, null=True, blank=True, editable=False, db_index=True)
+    # Name of the stored file when loaded, to detect a replaced image
+    _original_image_name = ''
     
     class Meta:
         constraints = [
@@ -55,10 +65,35 @@ class ProductImage(models.Model):
     def __str__(self):
         return f"{self.image_type.capitalize()} image for {self.product.product_name}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Read from __dict__ so a deferred image field isn't loaded
+        instance._original_image_name = str(instance.__dict__.get('image') or '')
+        return instance
+
     def save(self, *args, **kwargs):
         # If this is marked as primary and no primary image exists, save as usual
         # If a primary image already exists, that's handled by the unique constraint
+        if self.image and (
+            not self.content_hash
+            or not self.image._committed
+            or self.image.name != self._original_image_name
+        ):
+            self.content_hash = compute_file_hash(self.image)
+        elif not self.image:
+            self.content_hash = None
         super().save(*args, **kwargs)
+        previous_name = self._original_image_name
+        self._original_image_name = str(self.image or '')
+        if previous_name and previous_name != self._original_image_name:
+            transaction.on_commit(partial(delete_unused_image, previous_name))
+
+
+def delete_unused_image(name):
+    """Delete a replaced or deleted image and its renditions, unless still in use."""
+    if not ProductImage.objects.filter(image=name).exists():
+        delete_image_files(name)
 
 
 class ProductSize(models.Model):
@@ -75,6 +110,12 @@ class ProductSize(models.Model):
         return self.size_name
 
 
+class ProductVariantQuerySet(models.QuerySet):
+    def low_stock(self):
+        """Active variants whose stock has fallen to or below their reorder threshold."""
+        return self.filter(is_active=True, stock_quantity__lte=models.F('reorder_threshold'))
+
+
 class ProductVariant(models.Model):
     """
     Represents a specific variant of a product (e.g., a product in a specific size).
@@ -89,6 +130,19 @@ class ProductVariant(models.Model):
     reorder_threshold = models.IntegerField(default=0)
     is_active = models.BooleanField(default=True)
 
+    objects = ProductVariantQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Partial index covering only the rows the low stock report reads,
+            # so the report stays cheap however large the inventory grows.
+            models.Index(
+                fields=['product', 'size'],
+                condition=models.Q(is_active=True, stock_quantity__lte=models.F('reorder_threshold')),
+                name='low_stock_variant_idx'
+            )
+        ]
+
     def __str__(self):
         return f"{self.product.product_name} - {self.size.size_name}"
 
@@ -154,4 +208,41 @@ class ProductGroupMember(models.Model):
     name = models.CharField(max_length=255)
 
     def __str__(self):
-        return f"{self.product.product_name} in {self.group.group_name}"
\ No newline at end of file
+        return f"{self.product.product_name} in {self.group.group_name}"
+
+
+class ImageUpload(models.Model):
+    """
+    A chunked, resumable upload of a product image. Chunks are appended to
+    a temporary file; once complete the file is validated and attached to
+    the product as a ProductImage.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('complete', 'Complete'),
+    ]
+
+    # Random id so uploads in progress can't be guessed
+    upload_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='uploads')
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    filename = models.CharField(max_length=255)
+    total_size = models.BigIntegerField()
+    received_size = models.BigIntegerField(default=0)
+    image_type = models.CharField(
+        max_length=20,
+        choices=ProductImage.IMAGE_TYPE_CHOICES,
+        default='additional'
+    )
+    alt_text = models.CharField(max_length=255, null=True, blank=True)
+    # Appended after the product's existing images when not given
+    display_order = models.IntegerField(null=True, blank=True)
+    # Replace an existing primary/secondary image instead of failing
+    replace = models.BooleanField(default=False)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    product_image = models.ForeignKey(ProductImage, null=True, blank=True, on_delete=models.SET_NULL)
+    date_created = models.DateTimeField(auto_now_add=True)
+    date_updated = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Upload of {self.filename} ({self.received_size}/{self.total_size} bytes)"
@@ -0,0 +1,63 @@
+"""
+Inventory reports computed in the database.
+
+The aggregation happens in SQL and rows are streamed with iterator(), so
+report size does not depend on how many variants fit in memory.
+"""
+import csv
+
+from django.db.models import Count, F, Sum
+from django.http import StreamingHttpResponse
+
+from .models import ProductVariant
+
+LOW_STOCK_COLUMNS = [
+    ('product_id', 'Product ID'),
+    ('product__product_name', 'Product'),
+    ('size__size_code', 'Size code'),
+    ('size__size_name', 'Size'),
+    ('variant_count', 'Variants'),
+    ('total_stock', 'Stock'),
+    ('total_threshold', 'Reorder threshold'),
+    ('shortfall', 'Shortfall'),
+]
+
+
+def low_stock_report():
+    """
+    Return low stock variants aggregated per product and size, most
+    urgent (largest shortfall) first, as a queryset of dicts.
+    """
+    return (
+        ProductVariant.objects.low_stock()
+        .values('product_id', 'product__product_name', 'size__size_code', 'size__size_name')
+        .annotate(
+            variant_count=Count('variant_id'),
+            total_stock=Sum('stock_quantity'),
+            total_threshold=Sum('reorder_threshold'),
+            shortfall=Sum(F('reorder_threshold') - F('stock_quantity')),
+        )
+        .order_by('-shortfall', 'product__product_name', 'size__display_order')
+    )
+
+
+class Echo:
+    """File-like object whose write() returns the value, for streaming csv."""
+    def write(self, value):
+        return value
+
+
+def iter_low_stock_csv(rows=None, chunk_size=2000):
+    """Yield the low stock report as CSV lines, one row at a time."""
+    if rows is None:
+        rows = low_stock_report()
+    writer = csv.writer(Echo())
+    yield writer.writerow([label for _, label in LOW_STOCK_COLUMNS])
+    for row in rows.iterator(chunk_size=chunk_size):
+        yield writer.writerow([row[key] for key, _ in LOW_STOCK_COLUMNS])
+
+
+def low_stock_csv_response():
+    response = StreamingHttpResponse(iter_low_stock_csv(), content_type='text/csv')
+    response['Content-Disposition'] = 'attachment; filename="low_stock_report.csv"'
+    return response
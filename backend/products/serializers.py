@@ -1,5 +1,7 @@
 from rest_framework import serializers
-from .models import Product, ProductImage
+from .media import RENDITION_WIDTHS, hashed_file_url, hashed_media_url, rendition_name
+from .models import ImageUpload, Product, ProductImage, ProductVariant
+from .uploads import MAX_CHUNK_SIZE, MAX_UPLOAD_SIZE
 
 class ProductImageSerializer(serializers.ModelSerializer):
     image_url = serializers.SerializerMethodField()
@@ -12,10 +14,27 @@ class ProductImageSerializer(serializers.ModelSerializer):
         # This returns the complete URL to the image
         request = self.context.get('request')
         if obj.image and hasattr(obj.image, 'url'):
-            return request.build_absolute_uri(obj.image.url)
+            return request.build_absolute_uri(hashed_media_url(obj.image, obj.content_hash))
         return None
 
 class ProductSerializer(serializers.ModelSerializer):
+    """
+    Serializes a product in the shape the React app expects. A 'fields'
+    set in the context restricts the output to those keys, and only the
+    serializer fields needed to build them are evaluated.
+    """
+    # Keys of the output representation mapped to the serializer fields they are built from
+    REPRESENTATION_SOURCES = {
+        'id': ['product_id'],
+        'name': ['product_name'],
+        'price': ['base_price'],
+        'description': ['description'],
+        'image': ['primary_image', 'images'],
+        'secondaryImage': ['secondary_image'],
+        'category': [],
+        'images': ['images'],
+    }
+
     images = ProductImageSerializer(many=True, read_only=True)
     primary_image = serializers.SerializerMethodField()
     secondary_image = serializers.SerializerMethodField()
@@ -34,29 +53,212 @@ class ProductSerializer(serializers.ModelSerializer):
             'date_created'
         ]
     
-    def get_primary_image(self, obj):
-        primary = obj.images.filter(image_type='primary').first()
-        if primary:
-            return ProductImageSerializer(primary, context=self.context).data.get('image_url')
+    def get_fields(self):
+        fields = super().get_fields()
+        requested = self.context.get('fields')
+        if requested is not None:
+            needed = {
+                source
+                for key in requested
+                for source in self.REPRESENTATION_SOURCES.get(key, [])
+            }
+            fields = {name: field for name, field in fields.items() if name in needed}
+        return fields
+
+    def select_fields(self, representation):
+        requested = self.context.get('fields')
+        if requested is None:
+            return representation
+        return {key: value for key, value in representation.items() if key in requested}
+
+    def get_image_of_type(self, obj, image_type):
+        # Filter in Python so the prefetched images are reused
+        for image in obj.images.all():
+            if image.image_type == image_type:
+                return ProductImageSerializer(image, context=self.context).data.get('image_url')
         return None
+
+    def get_primary_image(self, obj):
+        return self.get_image_of_type(obj, 'primary')
     
     def get_secondary_image(self, obj):
-        secondary = obj.images.filter(image_type='secondary').first()
-        if secondary:
-            return ProductImageSerializer(secondary, context=self.context).data.get('image_url')
-        return None
+        return self.get_image_of_type(obj, 'secondary')
+
+    def get_category(self, obj):
+        # The first active category (see ProductViewSet.get_queryset), or
+        # None when the product has none or categories weren't loaded
+        if 'productcategory_set' not in getattr(obj, '_prefetched_objects_cache', {}):
+            return None
+        product_category = next(iter(obj.productcategory_set.all()), None)
+        return product_category.category.category_name.lower() if product_category else None
         
     def to_representation(self, instance):
         """Customize the output to match what the React app expects."""
         data = super().to_representation(instance)
+        images = data.get('images')
         # Map fields to match the React component's expected structure
+        return self.select_fields({
+            'id': data.get('product_id'),
+            'name': data.get('product_name'),
+            'price': float(data['base_price']) if 'base_price' in data else None,
+            'description': data.get('description'),
+            'image': data.get('primary_image') or (images[0]['image_url'] if images else None),
+            'secondaryImage': data.get('secondary_image'),
+            'category': self.get_category(instance),
+            'images': images
+        })
+
+class ProductVariantSerializer(serializers.ModelSerializer):
+    size = serializers.SerializerMethodField()
+    price = serializers.SerializerMethodField()
+    in_stock = serializers.SerializerMethodField()
+    low_stock = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ProductVariant
+        fields = ['variant_id', 'sku', 'size', 'price', 'in_stock', 'low_stock']
+
+    def get_size(self, obj):
         return {
-            'id': data['product_id'],
-            'name': data['product_name'],
-            'price': float(data['base_price']),
-            'description': data['description'],
-            'image': data['primary_image'] or (data['images'][0]['image_url'] if data['images'] else None),
-            'secondaryImage': data['secondary_image'],
-            'category': 'watches',  # You might want to add this field to your model
-            'images': data['images']
-        }
\ No newline at end of file
+            'id': obj.size.size_id,
+            'name': obj.size.size_name,
+            'code': obj.size.size_code,
+        }
+
+    def get_price(self, obj):
+        # The product is the parent of the serializer tree, so avoid
+        # following the FK again for every variant
+        product = self.context.get('product', obj.product)
+        return float(product.base_price + obj.price_adjustment)
+
+    def get_in_stock(self, obj):
+        return obj.stock_quantity > 0
+
+    def get_low_stock(self, obj):
+        return obj.stock_quantity <= obj.reorder_threshold
+
+class ProductDetailSerializer(ProductSerializer):
+    """
+    Full product representation for the detail page. Expects the
+    instance to come from ProductViewSet's detail queryset, which
+    prefetches every relation used here.
+    """
+    REPRESENTATION_SOURCES = {
+        **ProductSerializer.REPRESENTATION_SOURCES,
+        'categories': [],
+        'groups': [],
+        'variants': [],
+        'sizes': [],
+        'available': [],
+    }
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        categories = [pc.category for pc in instance.productcategory_set.all()]
+        memberships = instance.productgroupmember_set.all()
+        variants = ProductVariantSerializer(
+            instance.variants.all(), many=True,
+            context={**self.context, 'product': instance},
+        ).data
+
+        data['categories'] = [
+            {'id': category.category_id, 'name': category.category_name}
+            for category in categories
+        ]
+        data['groups'] = [
+            {
+                'id': member.group.group_id,
+                'name': member.group.group_name,
+                'display_order': member.display_order,
+            }
+            for member in memberships
+        ]
+        data['variants'] = variants
+        data['sizes'] = [variant['size'] for variant in variants]
+        data['available'] = any(variant['in_stock'] for variant in variants)
+        return self.select_fields(data)
+
+
+class RenditionImageSerializer(ProductImageSerializer):
+    """
+    An image with the URLs of its resized copies, keyed by width. Widths
+    the original is too small for (or not yet generated) are left out.
+    """
+    renditions = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ProductImage
+        fields = ['image_url', 'alt_text', 'renditions']
+
+    def get_renditions(self, obj):
+        if not obj.image:
+            return {}
+        request = self.context.get('request')
+        storage = obj.image.storage
+        renditions = {}
+        for width in RENDITION_WIDTHS:
+            name = rendition_name(obj.image.name, width)
+            if storage.exists(name):
+                renditions[width] = request.build_absolute_uri(
+                    hashed_file_url(storage, name, obj.content_hash)
+                )
+        return renditions
+
+
+class FeaturedProductSerializer(serializers.BaseSerializer):
+    """
+    A product group member as shown in the landing page carousels. Expects
+    the product and its images to be loaded with the member.
+    """
+    def to_representation(self, instance):
+        product = instance.product
+        images = {}
+        for image in product.images.all():
+            images.setdefault(image.image_type, image)
+        primary = images.get('primary') or next(iter(product.images.all()), None)
+        secondary = images.get('secondary')
+        return {
+            'id': product.product_id,
+            'name': instance.name or product.product_name,
+            'price': float(product.base_price),
+            'image': RenditionImageSerializer(primary, context=self.context).data if primary else None,
+            'secondaryImage': (
+                RenditionImageSerializer(secondary, context=self.context).data if secondary else None
+            ),
+        }
+
+
+class ImageUploadSerializer(serializers.ModelSerializer):
+    chunk_size = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ImageUpload
+        fields = [
+            'upload_id',
+            'product',
+            'filename',
+            'total_size',
+            'received_size',
+            'chunk_size',
+            'image_type',
+            'alt_text',
+            'display_order',
+            'replace',
+            'status',
+            'product_image',
+        ]
+        read_only_fields = ['received_size', 'status', 'product_image']
+
+    def get_chunk_size(self, obj):
+        return MAX_CHUNK_SIZE
+
+    def validate_total_size(self, value):
+        if not 0 < value <= MAX_UPLOAD_SIZE:
+            raise serializers.ValidationError(f"Uploads must be between 1 and {MAX_UPLOAD_SIZE} bytes.")
+        return value
+
+
+class ImageUploadUpdateSerializer(ImageUploadSerializer):
+    """The options of a pending upload, which can change until it completes."""
+    class Meta(ImageUploadSerializer.Meta):
+        read_only_fields = ImageUploadSerializer.Meta.read_only_fields + ['product', 'filename', 'total_size']
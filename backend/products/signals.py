@@ -0,0 +1,84 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import bump_catalog_version, invalidate_product_details
+from .models import (
+    Category, Product, ProductCategory, ProductGroup, ProductGroupMember,
+    ProductImage, ProductSize, ProductVariant, delete_unused_image,
+)
+from .tasks import generate_image_renditions, invalidate_featured
+
+
+def invalidate_details_on_commit(product_ids):
+    # Bumping before the commit would let a concurrent read cache the old
+    # rows under the new version, where they'd stay until the entry expires
+    transaction.on_commit(partial(invalidate_product_details, list(product_ids)))
+
+
+def bump_catalog_version_on_commit():
+    # Facets are versioned the same way as details
+    transaction.on_commit(bump_catalog_version)
+
+
+@receiver([post_save, post_delete], sender=Product)
+def product_changed(sender, instance, **kwargs):
+    invalidate_details_on_commit([instance.pk])
+    bump_catalog_version_on_commit()
+
+
+@receiver(post_save, sender=ProductImage)
+def product_image_saved(sender, instance, **kwargs):
+    # Resizing is too slow for the request, so it runs on a worker
+    if instance.image:
+        generate_image_renditions.enqueue(instance.pk, dedup_key=f"image-renditions:{instance.pk}")
+
+
+@receiver(post_delete, sender=ProductImage)
+def product_image_deleted(sender, instance, **kwargs):
+    if instance.image:
+        transaction.on_commit(partial(delete_unused_image, instance.image.name))
+
+
+@receiver([post_save, post_delete], sender=ProductImage)
+@receiver([post_save, post_delete], sender=ProductVariant)
+@receiver([post_save, post_delete], sender=ProductCategory)
+@receiver([post_save, post_delete], sender=ProductGroupMember)
+def product_relation_changed(sender, instance, **kwargs):
+    invalidate_details_on_commit([instance.product_id])
+
+
+@receiver([post_save, post_delete], sender=ProductSize)
+def size_changed(sender, instance, **kwargs):
+    product_ids = ProductVariant.objects.filter(size=instance).values_list('product_id', flat=True)
+    invalidate_details_on_commit(product_ids)
+
+
+@receiver([post_save, post_delete], sender=Category)
+def category_changed(sender, instance, **kwargs):
+    product_ids = ProductCategory.objects.filter(category=instance).values_list('product_id', flat=True)
+    invalidate_details_on_commit(product_ids)
+    bump_catalog_version_on_commit()
+
+
+@receiver([post_save, post_delete], sender=ProductCategory)
+def product_category_changed(sender, instance, **kwargs):
+    bump_catalog_version_on_commit()
+
+
+@receiver([post_save, post_delete], sender=ProductGroup)
+def group_changed(sender, instance, **kwargs):
+    product_ids = ProductGroupMember.objects.filter(group=instance).values_list('product_id', flat=True)
+    invalidate_details_on_commit(product_ids)
+
+
+@receiver([post_save, post_delete], sender=Product)
+@receiver([post_save, post_delete], sender=ProductImage)
+@receiver([post_save, post_delete], sender=ProductGroup)
+@receiver([post_save, post_delete], sender=ProductGroupMember)
+def featured_changed(sender, instance, **kwargs):
+    # Deferred like the other versions, so the refresh task can't rebuild
+    # the groups from rows that aren't committed yet
+    transaction.on_commit(invalidate_featured)
@@ -0,0 +1,82 @@
+"""Background tasks for the products app (run by taskqueue workers)."""
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from PIL import Image
+
+from taskqueue.registry import task
+
+from .cache import bump_featured_version, cache_is_shared
+from .media import RENDITION_WIDTHS, rendition_name
+from .models import ImageUpload, ProductImage
+from .uploads import discard_stale_uploads
+
+
+@task
+def generate_image_renditions(image_id):
+    """Write resized copies of a product image for listings and carousels."""
+    product_image = ProductImage.objects.filter(pk=image_id).first()
+    if product_image is None or not product_image.image:
+        return
+
+    with product_image.image.open('rb') as f:
+        original = Image.open(f)
+        original.load()
+    image_format = original.format or 'PNG'
+
+    generated = False
+    for width in RENDITION_WIDTHS:
+        if original.width <= width:
+            continue
+        generated = True
+        resized = original.copy()
+        resized.thumbnail((width, original.height))
+        buffer = BytesIO()
+        resized.save(buffer, format=image_format)
+
+        name = rendition_name(product_image.image.name, width)
+        if default_storage.exists(name):
+            default_storage.delete(name)
+        default_storage.save(name, ContentFile(buffer.getvalue()))
+
+    # Featured groups list the renditions that exist when they are built
+    if generated:
+        invalidate_featured()
+
+
+def invalidate_featured():
+    """
+    Drop the cached featured groups and rebuild them on a worker. Call it
+    once the change is committed (products.signals uses on_commit).
+    """
+    bump_featured_version()
+    # A worker can only precompute for the web processes through a shared
+    # cache; otherwise groups are rebuilt by the next request
+    if cache_is_shared():
+        refresh_featured_groups.enqueue(dedup_key='featured-groups')
+
+
+@task
+def refresh_featured_groups():
+    """Build the featured groups ahead of the next landing page request."""
+    # Imported here since the views import this module
+    from .warmup import warm_featured_groups
+    warm_featured_groups()
+
+
+@task
+def discard_abandoned_uploads():
+    """Discard uploads that stopped receiving chunks, and check again later."""
+    discard_stale_uploads(timezone.now() - settings.CHUNKED_UPLOAD_EXPIRY)
+    if ImageUpload.objects.filter(status='pending').exists():
+        schedule_upload_cleanup()
+
+
+def schedule_upload_cleanup():
+    """Queue discard_abandoned_uploads, unless a run is already pending."""
+    discard_abandoned_uploads.enqueue(
+        dedup_key='discard-abandoned-uploads', delay=settings.CHUNKED_UPLOAD_EXPIRY,
+    )
@@ -1,3 +1,889 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files import File
+from django.core.management import call_command
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.models import CustomUser
+from daynovadev import startup
+from daynovadev.query_budget import query_budget
+
+from .cache import (
+    catalog_version, detail_version, get_cached_detail, invalidate_product_details, set_cached_detail,
+    featured_version, set_cached_facets, set_cached_featured,
+)
+from .media import hashed_media_url, rendition_name
+from .models import (
+    Category, ImageUpload, Product, ProductCategory, ProductGroup, ProductGroupMember, ProductImage,
+    ProductSize, ProductVariant,
+)
+from .tasks import discard_abandoned_uploads, refresh_featured_groups
+from .uploads import chunk_path
+from .views import ImageUploadViewSet, LowStockReportView, ProductViewSet
+from .warmup import warm_catalog_cache
+from taskqueue.models import Task
+
+
+def make_image_bytes(size=(10, 10), color='red', image_format='PNG'):
+    buffer = BytesIO()
+    Image.new('RGB', size, color).save(buffer, image_format)
+    return buffer.getvalue()
+
+
+def make_image_file(name='front.png', **kwargs):
+    return SimpleUploadedFile(name, make_image_bytes(**kwargs), content_type='image/png')
+
+
+class MediaRootMixin:
+    """Store files and partial uploads in temporary directories for each test."""
+    def setUp(self):
+        super().setUp()
+        media_root, upload_dir = tempfile.mkdtemp(), tempfile.mkdtemp()
+        for path in (media_root, upload_dir):
+            self.addCleanup(shutil.rmtree, path, ignore_errors=True)
+        media_settings = self.settings(MEDIA_ROOT=media_root, CHUNKED_UPLOAD_DIR=upload_dir)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+
+
+class HashedMediaTests(MediaRootMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.product = Product.objects.create(product_name='Watch', base_price=100)
+        self.image = ProductImage.objects.create(
+            product=self.product, image=make_image_file(), image_type='primary',
+        )
+
+    def url(self, image=None):
+        image = image or self.image
+        return hashed_media_url(image.image, image.content_hash)
+
+    def test_serves_current_hash_as_immutable(self):
+        response = self.client.get(self.url())
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertEqual(response['ETag'], f'"{self.image.content_hash}"')
+
+    def test_not_modified(self):
+        response = self.client.get(self.url(), HTTP_IF_NONE_MATCH=f'"{self.image.content_hash}"')
+        self.assertEqual(response.status_code, 304)
+
+    def test_unknown_hash_is_not_found(self):
+        response = self.client.get(f'/media/v/0000000000000000/{self.image.image.name}')
+        self.assertEqual(response.status_code, 404)
+
+    def test_rendition_is_served_under_its_image_hash(self):
+        name = rendition_name(self.image.image.name, 400)
+        default_storage.save(name, BytesIO(make_image_bytes()))
+        response = self.client.get(f'/media/v/{self.image.content_hash}/{name}')
+        self.assertEqual(response.status_code, 200)
+
+    def test_replaced_image_is_removed(self):
+        old_url = self.url()
+        old_name = self.image.image.name
+        old_rendition = rendition_name(old_name, 400)
+        default_storage.save(old_rendition, BytesIO(make_image_bytes()))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.image.image = make_image_file(color='blue')
+            self.image.save()
+
+        self.assertFalse(default_storage.exists(old_name))
+        self.assertFalse(default_storage.exists(old_rendition))
+        self.assertEqual(self.client.get(old_url).status_code, 404)
+        self.assertEqual(self.client.get(self.url()).status_code, 200)
+
+    def test_old_hash_does_not_serve_new_bytes(self):
+        old_hash = self.image.content_hash
+        with self.captureOnCommitCallbacks(execute=True):
+            self.image.image = make_image_file(color='blue')
+            self.image.save()
+        response = self.client.get(f'/media/v/{old_hash}/{self.image.image.name}')
+        self.assertEqual(response.status_code, 404)
+
+    def test_deleted_image_is_removed(self):
+        name = self.image.image.name
+        with self.captureOnCommitCallbacks(execute=True):
+            self.image.delete()
+        self.assertFalse(default_storage.exists(name))
+
+    def get_range(self, header):
+        return self.client.get(self.url(), HTTP_RANGE=header)
+
+    def test_range_is_served_as_partial_content(self):
+        content = self.image.image.read()
+        response = self.get_range('bytes=5-9')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 5-9/{len(content)}')
+        self.assertEqual(b''.join(response.streaming_content), content[5:10])
+
+    def test_open_and_suffix_ranges(self):
+        content = self.image.image.read()
+        response = self.get_range(f'bytes={len(content) - 4}-')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(b''.join(response.streaming_content), content[-4:])
+
+        response = self.get_range('bytes=-3')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes {len(content) - 3}-{len(content) - 1}/{len(content)}')
+        self.assertEqual(b''.join(response.streaming_content), content[-3:])
+
+    def test_unsatisfiable_range(self):
+        size = self.image.image.size
+        response = self.get_range(f'bytes={size}-')
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f'bytes */{size}')
+
+    def test_invalid_ranges_get_the_whole_file(self):
+        for header in ('bytes=5-2', 'bytes=0-1,4-5', 'items=0-1'):
+            with self.subTest(header=header):
+                response = self.get_range(header)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotIn('Content-Range', response)
+
+    def test_stale_if_range_gets_the_whole_file(self):
+        response = self.client.get(self.url(), HTTP_RANGE='bytes=0-1', HTTP_IF_RANGE='"0000000000000000"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_loaded_image_keeps_its_hash_when_saved(self):
+        image = ProductImage.objects.get(pk=self.image.pk)
+        image.alt_text = 'Front'
+        with self.captureOnCommitCallbacks(execute=True):
+            image.save()
+        self.assertEqual(image.content_hash, self.image.content_hash)
+        self.assertTrue(default_storage.exists(image.image.name))
+
+
+class DetailCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.product = Product.objects.create(product_name='Watch', base_price=100)
+        self.url = f'/api/products/{self.product.pk}/'
+
+    def test_detail_is_served_from_cache(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(response.json()['name'], 'Watch')
+
+    def test_edits_invalidate_the_detail(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.product_name = 'Renamed'
+            self.product.save()
+        self.assertEqual(self.client.get(self.url).json()['name'], 'Renamed')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            size = ProductSize.objects.create(size_name='Small', size_code='S')
+            ProductVariant.objects.create(product=self.product, size=size, sku='W-S', stock_quantity=3)
+        self.assertEqual(len(self.client.get(self.url).json()['variants']), 1)
+
+    def test_read_before_the_commit_is_not_cached_as_current(self):
+        base_url = 'http://testserver/'
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                self.product.product_name = 'Renamed'
+                self.product.save()
+                # A concurrent request still sees the old row and caches it
+                # under the version current at that point
+                set_cached_detail(self.product.pk, base_url, {'name': 'Watch'}, detail_version(self.product.pk))
+        self.assertEqual(self.client.get(self.url).json()['name'], 'Renamed')
+
+    def test_invalidation_during_a_miss_is_not_lost(self):
+        base_url = 'http://testserver/'
+        version = detail_version(self.product.pk)
+        # The product changes while the stale representation is being built
+        invalidate_product_details([self.product.pk])
+        set_cached_detail(self.product.pk, base_url, {'name': 'stale'}, version)
+        self.assertIsNone(get_cached_detail(self.product.pk, base_url, detail_version(self.product.pk)))
+
+
+class ProductCategoryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.product = Product.objects.create(product_name='Watch', base_price=100)
+        self.detail_url = f'/api/products/{self.product.pk}/'
+
+    def add_categories(self, *names, is_active=True):
+        for name in names:
+            category = Category.objects.create(category_name=name, is_active=is_active)
+            ProductCategory.objects.create(product=self.product, category=category)
+
+    def categories(self):
+        listed = self.client.get('/api/products/').json()[0]
+        return listed['category'], self.client.get(self.detail_url).json()['category']
+
+    def test_no_category(self):
+        self.add_categories('Archive', is_active=False)
+        self.assertEqual(self.categories(), (None, None))
+
+    def test_first_active_category(self):
+        self.add_categories('Straps', 'Dress')
+        self.add_categories('Archive', is_active=False)
+        self.assertEqual(self.categories(), ('dress', 'dress'))
+
+    def test_categories_are_only_loaded_when_requested(self):
+        self.add_categories('Dress')
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/products/', {'fields': 'id,category'})
+        self.assertEqual(response.json(), [{'id': self.product.pk, 'category': 'dress'}])
+        with self.assertNumQueries(1):
+            self.client.get('/api/products/', {'fields': 'id,name'})
+
+
+class SparseFieldsetTests(MediaRootMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.product = Product.objects.create(product_name='Watch', base_price=100, description='Steel')
+        ProductImage.objects.create(product=self.product, image=make_image_file(), image_type='primary')
+        size = ProductSize.objects.create(size_name='Small', size_code='S')
+        ProductVariant.objects.create(product=self.product, size=size, sku='W-S', stock_quantity=3)
+        self.detail_url = f'/api/products/{self.product.pk}/'
+
+    def test_list_is_trimmed_to_the_requested_fields(self):
+        response = self.client.get('/api/products/', {'fields': 'id, name'})
+        self.assertEqual(response.json(), [{'id': self.product.pk, 'name': 'Watch'}])
+
+    def test_list_selects_only_the_needed_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/api/products/', {'fields': 'id,price'})
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('description', queries[0]['sql'])
+        self.assertNotIn('product_name', queries[0]['sql'])
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/products/', {'fields': 'id,image'})
+        # Image fields still prefetch the images
+        self.assertEqual(len(queries), 2)
+        self.assertTrue(response.json()[0]['image'])
+
+    def test_unknown_fields_are_rejected(self):
+        for url in ('/api/products/', self.detail_url):
+            response = self.client.get(url, {'fields': 'id,bogus'})
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('bogus', response.json()['fields'])
+        # 'variants' only exists on the detail
+        self.assertEqual(self.client.get('/api/products/', {'fields': 'variants'}).status_code, 400)
+
+    def test_retrieve_trims_the_cached_detail(self):
+        response = self.client.get(self.detail_url, {'fields': 'id,variants'})
+        self.assertEqual(set(response.json()), {'id', 'variants'})
+        # The whole detail was cached, so other selections need no queries
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.detail_url, {'fields': 'name'}).json(), {'name': 'Watch'})
+            full = self.client.get(self.detail_url).json()
+        self.assertIn('description', full)
+        self.assertEqual(len(full['variants']), 1)
+
+    def test_batch_is_trimmed_to_the_requested_fields(self):
+        response = self.client.get('/api/products/batch/', {'ids': self.product.pk, 'fields': 'id'})
+        self.assertEqual(response.json()['results'], [{'id': self.product.pk}])
+
+
+class BatchTests(TestCase):
+    url = '/api/products/batch/'
+
+    def setUp(self):
+        size = ProductSize.objects.create(size_name='Small', size_code='S')
+        self.products = [Product.objects.create(product_name=f'Watch {i}', base_price=100) for i in range(3)]
+        for product in self.products:
+            ProductVariant.objects.create(product=product, size=size, sku=f'SKU-{product.pk}')
+        self.inactive = Product.objects.create(product_name='Retired', base_price=100, is_active=False)
+        ProductVariant.objects.create(product=self.inactive, size=size, sku='SKU-RETIRED')
+
+    def batch(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        return [item['id'] for item in data['results']], data['missing']
+
+    def test_results_follow_the_requested_order(self):
+        first, second, third = self.products
+        ids, missing = self.batch(ids=f'{third.pk},{first.pk},{second.pk}')
+        self.assertEqual(ids, [third.pk, first.pk, second.pk])
+        self.assertEqual(missing, {'ids': [], 'skus': []})
+
+    def test_unknown_and_inactive_products_are_missing(self):
+        ids, missing = self.batch(ids=f'{self.products[0].pk},999999,{self.inactive.pk}', skus='NOPE,SKU-RETIRED')
+        self.assertEqual(ids, [self.products[0].pk])
+        self.assertEqual(missing, {'ids': [999999, self.inactive.pk], 'skus': ['NOPE', 'SKU-RETIRED']})
+
+    def test_lookup_by_sku_after_ids(self):
+        first, second, third = self.products
+        ids, missing = self.batch(ids=str(second.pk), skus=f'SKU-{third.pk},SKU-{first.pk}')
+        self.assertEqual(ids, [second.pk, third.pk, first.pk])
+        self.assertEqual(missing, {'ids': [], 'skus': []})
+
+    def test_duplicates_are_returned_once(self):
+        first, second, _ = self.products
+        ids, _ = self.batch(ids=f'{first.pk},{second.pk},{first.pk}', skus=f'SKU-{second.pk}')
+        self.assertEqual(ids, [first.pk, second.pk])
+
+    def test_limit(self):
+        ids = ','.join(str(n) for n in range(1, 100))
+        self.assertEqual(self.client.get(self.url, {'ids': ids, 'skus': 'A'}).status_code, 200)
+        response = self.client.get(self.url, {'ids': ids, 'skus': 'A,B'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_ids_must_be_integers(self):
+        response = self.client.get(self.url, {'ids': '1,x'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('ids', response.json())
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class LowStockReportTests(TestCase):
+    url = '/api/reports/low-stock/'
+    header = 'Product ID,Product,Size code,Size,Variants,Stock,Reorder threshold,Shortfall'
+
+    def setUp(self):
+        self.alpha = Product.objects.create(product_name='Alpha', base_price=100)
+        beta = Product.objects.create(product_name='Beta', base_price=100)
+        small = ProductSize.objects.create(size_name='Small', size_code='S', display_order=0)
+        medium = ProductSize.objects.create(size_name='Medium', size_code='M', display_order=1)
+        for sku, product, size, stock, threshold, is_active in [
+            ('A-S-1', self.alpha, small, 1, 5, True),
+            ('A-S-2', self.alpha, small, 2, 3, True),
+            # At the threshold counts as low stock
+            ('A-M', self.alpha, medium, 4, 4, True),
+            ('B-S', beta, small, 5, 4, True),
+            ('B-M', beta, medium, 0, 2, True),
+            ('B-M-old', beta, medium, 0, 10, False),
+        ]:
+            ProductVariant.objects.create(
+                product=product, size=size, sku=sku, stock_quantity=stock,
+                reorder_threshold=threshold, is_active=is_active,
+            )
+        self.admin = APIClient()
+        self.admin.force_authenticate(
+            CustomUser.objects.create_superuser(email='admin@example.com', password='Sup3rpass!!x')
+        )
+
+    def test_rows_are_grouped_by_product_and_size(self):
+        response = self.admin.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [
+                (row['product_name'], row['size_code'], row['variant_count'],
+                 row['total_stock'], row['total_threshold'], row['shortfall'])
+                for row in response.json()
+            ],
+            [('Alpha', 'S', 2, 3, 8, 5), ('Beta', 'M', 1, 0, 2, 2), ('Alpha', 'M', 1, 4, 4, 0)],
+        )
+
+    def test_csv_export_is_streamed(self):
+        response = self.admin.get(self.url, {'export': 'csv'})
+        self.assertTrue(response.streaming)
+        self.assertIn('attachment', response['Content-Disposition'])
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], self.header)
+        self.assertEqual(lines[1], f'{self.alpha.pk},Alpha,S,Small,2,3,8,5')
+        self.assertEqual(len(lines), 4)
+
+    def test_only_admins(self):
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+        client = APIClient()
+        client.force_authenticate(CustomUser.objects.create_user(email='a@example.com', password='Sup3rpass!!x'))
+        self.assertEqual(client.get(self.url).status_code, 403)
+
+    def test_management_command(self):
+        stdout = StringIO()
+        call_command('low_stock_report', stdout=stdout)
+        lines = stdout.getvalue().splitlines()
+        self.assertEqual((lines[0], len(lines)), (self.header, 4))
+
+        output = os.path.join(tempfile.mkdtemp(), 'report.csv')
+        self.addCleanup(shutil.rmtree, os.path.dirname(output))
+        stdout = StringIO()
+        call_command('low_stock_report', output=output, stdout=stdout)
+        self.assertIn(output, stdout.getvalue())
+        with open(output, newline='') as f:
+            self.assertEqual(f.read().splitlines(), lines)
+
+
+class FacetTests(TestCase):
+    url = '/api/products/facets/'
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        watches = Category.objects.create(category_name='Watches')
+        straps = Category.objects.create(category_name='Straps')
+        for price, category in [(10, watches), (20, watches), (30, watches), (40, straps), (100, straps)]:
+            product = Product.objects.create(product_name=f'Item {price}', base_price=price)
+            ProductCategory.objects.create(product=product, category=category)
+        Product.objects.create(product_name='Retired', base_price=500, is_active=False)
+
+    def facets(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_count_and_price_range(self):
+        data = self.facets()
+        self.assertEqual(data['count'], 5)
+        self.assertEqual((data['price']['min'], data['price']['max']), (10, 100))
+
+    def test_histogram_buckets(self):
+        histogram = self.facets(buckets=3)['price']['histogram']
+        self.assertEqual(
+            [(bucket['min'], bucket['max'], bucket['count']) for bucket in histogram],
+            [(10, 40, 3), (40, 70, 1), (70, 100, 1)],
+        )
+
+    def test_histogram_of_a_single_price(self):
+        histogram = self.facets(min_price=20, max_price=20)['price']['histogram']
+        self.assertEqual(histogram, [{'min': 20, 'max': 20, 'count': 1}])
+
+    def test_category_counts_ignore_the_category_filter(self):
+        data = self.facets(category='watches')
+        self.assertEqual(data['count'], 3)
+        self.assertEqual(
+            [(category['name'], category['count']) for category in data['categories']],
+            [('Straps', 2), ('Watches', 3)],
+        )
+
+    def test_category_counts_follow_the_other_filters(self):
+        data = self.facets(min_price=20, max_price=40)
+        self.assertEqual(data['count'], 3)
+        self.assertEqual(
+            [(category['name'], category['count']) for category in data['categories']],
+            [('Straps', 1), ('Watches', 2)],
+        )
+
+    def test_invalid_buckets(self):
+        for buckets in ('x', 0, 51):
+            self.assertEqual(self.client.get(self.url, {'buckets': buckets}).status_code, 400)
+
+    def test_invalid_prices_are_rejected(self):
+        for params in ({'min_price': 'abc'}, {'max_price': 'nan'}, {'min_price': 'inf'}):
+            for url in (self.url, '/api/products/'):
+                response = self.client.get(url, params)
+                self.assertEqual(response.status_code, 400)
+                self.assertIn(next(iter(params)), response.json())
+
+    def test_product_changes_invalidate_the_facets(self):
+        self.assertEqual(self.facets()['count'], 5)
+        with self.assertNumQueries(0):
+            self.facets()
+        with self.captureOnCommitCallbacks(execute=True):
+            Product.objects.create(product_name='Item 200', base_price=200)
+        data = self.facets()
+        self.assertEqual((data['count'], data['price']['max']), (6, 200))
+
+    def test_read_before_the_commit_is_not_cached_as_current(self):
+        params = {name: None for name in ('category', 'min_price', 'max_price', 'search')}
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                Product.objects.create(product_name='Item 200', base_price=200)
+                # A concurrent request computes the facets without it
+                set_cached_facets({**params, 'buckets': 10}, {'count': 5}, catalog_version())
+        self.assertEqual(self.facets()['count'], 6)
+
+
+class FeaturedTests(TestCase):
+    url = '/api/products/featured/hero/'
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.group = ProductGroup.objects.create(group_name='hero')
+        self.products = [
+            Product.objects.create(product_name=f'Watch {i}', base_price=100 + i) for i in range(3)
+        ]
+        for display_order, product in zip([2, 0, 1], self.products):
+            ProductGroupMember.objects.create(
+                product=product, group=self.group, display_order=display_order, name='',
+            )
+
+    def ids(self, response):
+        return [item['id'] for item in response.json()['results']]
+
+    def test_members_in_display_order(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.ids(response), [self.products[1].pk, self.products[2].pk, self.products[0].pk])
+        self.assertIn('max-age=', response['Cache-Control'])
+
+    def test_served_from_cache(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            self.client.get(self.url)
+
+    def test_membership_changes_refresh_the_group(self):
+        self.client.get(self.url)
+        ProductGroupMember.objects.filter(product=self.products[0]).update(display_order=-1)
+        # update() bypasses signals, so the cached order is still served
+        self.assertEqual(self.ids(self.client.get(self.url))[0], self.products[1].pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ProductGroupMember.objects.get(product=self.products[0]).save()
+        self.assertEqual(self.ids(self.client.get(self.url))[0], self.products[0].pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ProductGroupMember.objects.get(product=self.products[1]).delete()
+        self.assertNotIn(self.products[1].pk, self.ids(self.client.get(self.url)))
+
+    def test_read_before_the_commit_is_not_cached_as_current(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                ProductGroupMember.objects.get(product=self.products[1]).delete()
+                # A concurrent request still sees the old membership
+                set_cached_featured('hero', 'http://testserver/', {'results': []}, featured_version())
+        self.assertEqual(len(self.client.get(self.url).json()['results']), 2)
+
+    def test_inactive_and_unknown_groups_are_not_found(self):
+        self.assertEqual(self.client.get('/api/products/featured/nope/').status_code, 404)
+        self.group.is_active = False
+        self.group.save()
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    @mock.patch('products.tasks.cache_is_shared', return_value=True)
+    def test_changes_queue_a_refresh_with_a_shared_cache(self, cache_is_shared):
+        Task.objects.all().delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.group.save()
+            self.group.save()
+            # Nothing is queued before the change is committed
+            self.assertFalse(Task.objects.filter(dedup_key='featured-groups').exists())
+        self.assertEqual(Task.objects.filter(dedup_key='featured-groups', status='pending').count(), 1)
+
+    @mock.patch('products.tasks.cache_is_shared', return_value=False)
+    def test_no_refresh_task_without_a_shared_cache(self, cache_is_shared):
+        Task.objects.all().delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.group.save()
+        self.assertFalse(Task.objects.filter(dedup_key='featured-groups').exists())
+
+    @override_settings(CATALOG_WARMUP_BASE_URLS=['http://testserver/'], ALLOWED_HOSTS=['testserver'])
+    def test_refresh_task_precomputes_groups(self):
+        refresh_featured_groups()
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url)
+        self.assertEqual(len(response.json()['results']), 3)
+
+    @override_settings(CATALOG_WARMUP_BASE_URLS=['http://elsewhere.example/'], ALLOWED_HOSTS=['testserver'])
+    def test_refresh_task_skips_disallowed_hosts(self):
+        with self.assertLogs('products.warmup', 'WARNING'):
+            refresh_featured_groups()
+
+
+@override_settings(
+    CATALOG_WARMUP=True, CATALOG_WARMUP_BASE_URLS=['http://testserver/'], ALLOWED_HOSTS=['testserver'],
+)
+class WarmupTests(TestCase):
+    base_url = 'http://testserver/'
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        group = ProductGroup.objects.create(group_name='hero')
+        self.products = [Product.objects.create(product_name=f'Watch {i}', base_price=100) for i in range(2)]
+        ProductGroupMember.objects.create(product=self.products[0], group=group, display_order=0, name='')
+        # Closing connections would end the test's transaction
+        close_all = mock.patch.object(startup.connections, 'close_all')
+        close_all.start()
+        self.addCleanup(close_all.stop)
+
+    def is_warm(self, product, base_url=base_url):
+        return get_cached_detail(product.pk, base_url, detail_version(product.pk)) is not None
+
+    def test_first_requests_are_served_from_cache(self):
+        warm_catalog_cache()
+        with self.assertNumQueries(0):
+            for url in [
+                '/api/products/featured/hero/', '/api/products/facets/',
+                *(f'/api/products/{product.pk}/' for product in self.products),
+            ]:
+                self.assertEqual(self.client.get(url).status_code, 200)
+
+    @override_settings(CATALOG_WARMUP_BASE_URLS=['http://elsewhere.example/', 'http://testserver/'])
+    def test_disallowed_hosts_are_skipped(self):
+        with self.assertLogs('products.warmup', 'WARNING') as logs:
+            warm_catalog_cache()
+        self.assertIn('http://elsewhere.example/', logs.output[0])
+        self.assertTrue(self.is_warm(self.products[0]))
+        self.assertFalse(self.is_warm(self.products[0], 'http://elsewhere.example/'))
+
+    def test_nothing_to_do(self):
+        for overrides in [{'CATALOG_WARMUP': False}, {'CATALOG_WARMUP_BASE_URLS': []}]:
+            with self.subTest(**overrides), self.settings(**overrides), self.assertNumQueries(0):
+                warm_catalog_cache()
+
+    def test_existing_entries_are_left_alone(self):
+        # Entries another process put in a shared cache aren't rebuilt
+        with mock.patch('products.warmup.get_cached_detail', return_value={'id': 0}), \
+                mock.patch('products.warmup.set_cached_detail') as set_detail:
+            warm_catalog_cache()
+        set_detail.assert_not_called()
+
+    def test_application_ready_warms_the_cache(self):
+        startup.warm_up(mock.Mock())
+        self.assertTrue(self.is_warm(self.products[1]))
+
+    def test_failed_warm_up_is_logged(self):
+        with mock.patch('products.warmup.warm_featured_groups', side_effect=RuntimeError("down")), \
+                self.assertLogs('django.dispatch', 'ERROR'):
+            startup.warm_up(mock.Mock())
+        startup.connections.close_all.assert_called_once_with()
+
+    def test_failing_receiver_does_not_stop_the_warm_up(self):
+        def fail(**kwargs):
+            raise RuntimeError("down")
+
+        startup.application_ready.connect(fail)
+        self.addCleanup(startup.application_ready.disconnect, fail)
+        with self.assertLogs('django.dispatch', 'ERROR'):
+            startup.warm_up(mock.Mock())
+        self.assertTrue(self.is_warm(self.products[1]))
+
+    def test_servers_send_application_ready(self):
+        for get_application in (startup.get_wsgi_application, startup.get_asgi_application):
+            with self.subTest(get_application.__name__), \
+                    mock.patch.object(startup.application_ready, 'send_robust') as send_robust:
+                application = get_application()
+            send_robust.assert_called_once_with(sender=application.__class__)
+
+
+class ImageUploadTests(MediaRootMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.client.force_authenticate(
+            CustomUser.objects.create_superuser(email='admin@example.com', password='Sup3rpass!!x')
+        )
+        self.product = Product.objects.create(product_name='Watch', base_price=100)
+
+    def start(self, content, **fields):
+        response = self.client.post('/api/uploads/', {
+            'product': self.product.pk, 'filename': 'front.png', 'total_size': len(content), **fields,
+        })
+        self.assertEqual(response.status_code, 201)
+        return ImageUpload.objects.get(pk=response.json()['upload_id'])
+
+    def send(self, upload, content, start=0):
+        return self.client.put(
+            f'/api/uploads/{upload.pk}/chunk/', content, content_type='application/octet-stream',
+            HTTP_CONTENT_RANGE=f'bytes {start}-{start + len(content) - 1}/{upload.total_size}',
+        )
+
+    def upload(self, content=None, **fields):
+        content = content or make_image_bytes()
+        upload = self.start(content, **fields)
+        self.assertEqual(self.send(upload, content).status_code, 200)
+        return upload
+
+    def complete(self, upload):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(f'/api/uploads/{upload.pk}/complete/')
+
+    def stored_files(self):
+        _, files = default_storage.listdir('products')
+        return {f'products/{name}' for name in files}
+
+    def test_chunked_upload_is_attached(self):
+        content = make_image_bytes()
+        third = len(content) // 3
+        upload = self.start(content, image_type='primary')
+        self.assertEqual(self.send(upload, content[:third]).json()['received_size'], third)
+        # A chunk that doesn't continue from the current offset is refused
+        response = self.send(upload, content[2 * third:], start=2 * third)
+        self.assertEqual((response.status_code, response.json()['offset']), (409, third))
+        self.assertEqual(self.send(upload, content[third:], start=third).status_code, 200)
+
+        response = self.complete(upload)
+        self.assertEqual(response.status_code, 201)
+        image = self.product.images.get()
+        self.assertEqual((image.pk, image.image_type), (response.json()['image_id'], 'primary'))
+        self.assertFalse(os.path.exists(chunk_path(upload)))
+
+    def test_completing_twice_attaches_once(self):
+        upload = self.upload()
+        self.assertEqual(self.complete(upload).status_code, 201)
+        self.assertEqual(self.complete(upload).status_code, 409)
+        self.assertEqual(self.product.images.count(), 1)
+
+    def test_existing_primary_can_be_replaced_after_a_conflict(self):
+        existing = ProductImage.objects.create(
+            product=self.product, image=make_image_file(), image_type='primary',
+        )
+        upload = self.upload(image_type='primary')
+        self.assertEqual(self.complete(upload).status_code, 409)
+        self.assertTrue(os.path.exists(chunk_path(upload)))
+
+        response = self.client.patch(f'/api/uploads/{upload.pk}/', {'replace': True, 'total_size': 1})
+        self.assertEqual(response.status_code, 200)
+        upload.refresh_from_db()
+        self.assertEqual((upload.replace, upload.total_size), (True, len(make_image_bytes())))
+
+        self.assertEqual(self.complete(upload).status_code, 201)
+        self.assertEqual(self.product.images.get().pk, existing.pk)
+        self.assertEqual(self.stored_files(), {self.product.images.get().image.name})
+
+    def test_concurrently_attached_primary_is_a_conflict(self):
+        upload = self.upload(image_type='primary')
+
+        def attach_other_primary(f):
+            # Another request attaches a primary image after the check
+            ProductImage.objects.create(
+                product=self.product, image=make_image_file('other.png'), image_type='primary',
+            )
+            return File(f)
+
+        with mock.patch('products.uploads.File', side_effect=attach_other_primary):
+            response = self.complete(upload)
+        self.assertEqual(response.status_code, 409)
+        # The copy of the upload stored before the conflict was removed
+        self.assertEqual([name for name in self.stored_files() if 'front' in name], [])
+        upload.refresh_from_db()
+        self.assertEqual(upload.status, 'pending')
+
+    def test_invalid_image_discards_the_upload(self):
+        upload = self.upload(b'not an image at all')
+        response = self.complete(upload)
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(ImageUpload.objects.filter(pk=upload.pk).exists())
+        self.assertFalse(os.path.exists(chunk_path(upload)))
+
+    def test_abandoned_uploads_are_discarded(self):
+        self.assertFalse(Task.objects.filter(dedup_key='discard-abandoned-uploads').exists())
+        stale, fresh = self.upload(), self.upload()
+        self.assertEqual(Task.objects.filter(dedup_key='discard-abandoned-uploads', status='pending').count(), 1)
+        long_ago = timezone.now() - timedelta(days=2)
+        ImageUpload.objects.filter(pk=stale.pk).update(date_updated=long_ago)
+        orphan = os.path.join(os.path.dirname(chunk_path(fresh)), 'orphan.part')
+        open(orphan, 'wb').close()
+        os.utime(orphan, (long_ago.timestamp(), long_ago.timestamp()))
+        Task.objects.all().delete()
+
+        discard_abandoned_uploads()
+        self.assertEqual(list(ImageUpload.objects.values_list('pk', flat=True)), [fresh.pk])
+        self.assertFalse(os.path.exists(chunk_path(stale)))
+        self.assertFalse(os.path.exists(orphan))
+        self.assertTrue(os.path.exists(chunk_path(fresh)))
+        # Checked again while uploads are pending
+        self.assertTrue(Task.objects.filter(dedup_key='discard-abandoned-uploads', status='pending').exists())
+
+
+class ProductQueryBudgetTests(MediaRootMixin, TestCase):
+    """Each endpoint stays within its view's query_budget on a cold cache."""
+    budget = ProductViewSet.query_budget
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.addCleanup(cache.clear)
+        category = Category.objects.create(category_name='Watches')
+        group = ProductGroup.objects.create(group_name='hero')
+        sizes = [ProductSize.objects.create(size_name=code, size_code=code) for code in ('S', 'M')]
+        self.products = []
+        for i in range(3):
+            product = Product.objects.create(product_name=f'Watch {i}', base_price=100 + i)
+            ProductCategory.objects.create(product=product, category=category)
+            ProductGroupMember.objects.create(product=product, group=group, display_order=i, name='')
+            for image_type in ('primary', 'secondary', 'additional'):
+                ProductImage.objects.create(
+                    product=product, image=make_image_file(f'{image_type}.png'), image_type=image_type,
+                )
+            for size in sizes:
+                ProductVariant.objects.create(
+                    product=product, size=size, sku=f'W{i}-{size.size_code}',
+                    stock_quantity=i, reorder_threshold=1,
+                )
+            self.products.append(product)
+        cache.clear()
+
+    def test_list(self):
+        with query_budget(self.budget['list']):
+            response = self.client.get('/api/products/', {'category': 'Watches'})
+        self.assertEqual(len(response.json()), 3)
+
+    def test_retrieve(self):
+        with query_budget(self.budget['retrieve']):
+            response = self.client.get(f'/api/products/{self.products[0].pk}/')
+        self.assertEqual(len(response.json()['variants']), 2)
+
+    def test_batch(self):
+        ids = ','.join(str(product.pk) for product in self.products)
+        with query_budget(self.budget['batch']):
+            response = self.client.get('/api/products/batch/', {'ids': ids})
+        self.assertEqual(response.status_code, 200)
+
+    def test_facets(self):
+        with query_budget(self.budget['facets']):
+            response = self.client.get('/api/products/facets/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_featured(self):
+        with query_budget(self.budget['featured']):
+            response = self.client.get('/api/products/featured/hero/')
+        self.assertEqual(len(response.json()['results']), 3)
+
+    def test_low_stock_report(self):
+        admin = CustomUser.objects.create_superuser(email='admin@example.com', password='Sup3rpass!!x')
+        access = RefreshToken.for_user(admin).access_token
+        with query_budget(LowStockReportView.query_budget):
+            response = self.client.get('/api/reports/low-stock/', HTTP_AUTHORIZATION=f'Bearer {access}')
+        self.assertEqual(len(response.json()), 4)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class UploadQueryBudgetTests(MediaRootMixin, TestCase):
+    """Each upload action stays within ImageUploadViewSet.query_budget."""
+    budget = ImageUploadViewSet.query_budget
+
+    def setUp(self):
+        super().setUp()
+        admin = CustomUser.objects.create_superuser(email='admin@example.com', password='Sup3rpass!!x')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(admin).access_token}')
+        self.product = Product.objects.create(product_name='Watch', base_price=100)
+        ProductImage.objects.create(product=self.product, image=make_image_file(), image_type='additional')
+        self.content = make_image_bytes()
+
+    def create(self):
+        with query_budget(self.budget['create']):
+            response = self.client.post('/api/uploads/', {
+                'product': self.product.pk, 'filename': 'front.png', 'total_size': len(self.content),
+                'image_type': 'primary',
+            })
+        self.assertEqual(response.status_code, 201)
+        return f"/api/uploads/{response.json()['upload_id']}/"
+
+    def test_upload_actions(self):
+        url = self.create()
+        with query_budget(self.budget['retrieve']):
+            self.assertEqual(self.client.get(url).status_code, 200)
+        with query_budget(self.budget['partial_update']):
+            self.assertEqual(self.client.patch(url, {'alt_text': 'Front'}).status_code, 200)
+        with query_budget(self.budget['chunk']):
+            response = self.client.put(
+                f'{url}chunk/', self.content, content_type='application/octet-stream',
+                HTTP_CONTENT_RANGE=f'bytes 0-{len(self.content) - 1}/{len(self.content)}',
+            )
+        self.assertEqual(response.status_code, 200)
+        with query_budget(self.budget['complete']):
+            self.assertEqual(self.client.post(f'{url}complete/').status_code, 201)
+
+    def test_destroy(self):
+        url = self.create()
+        with query_budget(self.budget['destroy']):
+            self.assertEqual(self.client.delete(url).status_code, 204)
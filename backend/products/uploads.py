@@ -0,0 +1,213 @@
+"""
+Chunked, resumable product image uploads.
+
+A client creates an upload, PUTs the file in sequential chunks (each
+streamed straight to a temporary file), and can ask for the current
+offset to resume after an interruption. Completing the upload validates
+the image from its header, without decoding the pixels, and attaches it
+to the product as a ProductImage.
+
+An upload whose file is not a valid image is discarded when completion
+fails. Pending uploads left alone for CHUNKED_UPLOAD_EXPIRY are discarded
+by the discard_abandoned_uploads task.
+"""
+import os
+import re
+from functools import partial
+
+from django.conf import settings
+from django.core.files import File
+from django.db import IntegrityError, transaction
+from django.db.models import Max
+from PIL import Image, UnidentifiedImageError
+
+from .models import ImageUpload, ProductImage
+
+MAX_UPLOAD_SIZE = 50 * 1024 * 1024
+MAX_CHUNK_SIZE = 8 * 1024 * 1024
+READ_SIZE = 64 * 1024
+ALLOWED_FORMATS = {'JPEG', 'PNG', 'WEBP'}
+MAX_DIMENSION = 10000
+CONTENT_RANGE_RE = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+
+
+class UploadError(Exception):
+    def __init__(self, message, status=400, **extra):
+        super().__init__(message)
+        self.status = status
+        self.extra = extra
+
+
+class InvalidImage(UploadError):
+    """The assembled file is not an acceptable image; the upload can't succeed."""
+
+
+def chunk_path(upload):
+    return os.path.join(settings.CHUNKED_UPLOAD_DIR, f"{upload.upload_id}.part")
+
+
+def parse_content_range(header, upload):
+    """Return (start, length) of the chunk described by a Content-Range header."""
+    match = CONTENT_RANGE_RE.match(header.strip())
+    if not match:
+        raise UploadError("Invalid Content-Range header.")
+    start, end, total = (int(value) for value in match.groups())
+    if total != upload.total_size or end < start or end >= total:
+        raise UploadError("Content-Range does not match the upload.")
+    return start, end - start + 1
+
+
+def append_chunk(upload, stream, start, length):
+    """
+    Stream a chunk from the request body onto the end of the partial file.
+    The upload row must be locked by the caller.
+    """
+    if start != upload.received_size:
+        raise UploadError(
+            "Chunk does not start at the current offset.",
+            status=409, offset=upload.received_size,
+        )
+    if length > MAX_CHUNK_SIZE:
+        raise UploadError(f"Chunks may be at most {MAX_CHUNK_SIZE} bytes.", status=413)
+    if start + length > upload.total_size:
+        raise UploadError("Chunk extends past the end of the upload.")
+
+    path = chunk_path(upload)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    mode = 'r+b' if os.path.exists(path) else 'wb'
+    with open(path, mode) as f:
+        # Drop anything left over from an earlier interrupted chunk
+        f.seek(start)
+        f.truncate()
+        remaining = length
+        while remaining > 0:
+            data = stream.read(min(READ_SIZE, remaining))
+            if not data:
+                break
+            f.write(data)
+            remaining -= len(data)
+        if remaining:
+            f.truncate(start)
+            raise UploadError("Chunk body is shorter than declared.", offset=start)
+
+    upload.received_size = start + length
+    upload.save(update_fields=['received_size', 'date_updated'])
+
+
+def validate_image(path):
+    """
+    Check the file's format and dimensions. Image.open() only reads the
+    header, and verify() checks the file structure without decoding pixels.
+    """
+    try:
+        with Image.open(path) as image:
+            image_format, (width, height) = image.format, image.size
+            if image_format not in ALLOWED_FORMATS:
+                raise InvalidImage(f"Unsupported image format: {image_format}.")
+            if width > MAX_DIMENSION or height > MAX_DIMENSION:
+                raise InvalidImage(f"Images may be at most {MAX_DIMENSION}px on each side.")
+            image.verify()
+    except UnidentifiedImageError:
+        raise InvalidImage("Not a valid image.")
+    except Image.DecompressionBombError:
+        raise InvalidImage("Image has too many pixels.")
+    except (SyntaxError, OSError):
+        # Raised by verify() for truncated or corrupt files
+        raise InvalidImage("Image file is corrupt.")
+    return image_format, width, height
+
+
+def complete_upload(upload):
+    """
+    Validate the assembled file and attach it to the product. The upload
+    row must be locked by the caller, inside a transaction.
+    """
+    if upload.status != 'pending':
+        raise UploadError("Upload is already complete.", status=409)
+    if upload.received_size != upload.total_size:
+        raise UploadError(
+            "Upload is incomplete.", status=409, offset=upload.received_size,
+        )
+    path = chunk_path(upload)
+    validate_image(path)
+
+    existing = None
+    if upload.image_type in ('primary', 'secondary'):
+        # unique_image_type_per_product allows one of each per product
+        existing = (
+            ProductImage.objects.select_for_update()
+            .filter(product=upload.product, image_type=upload.image_type)
+            .first()
+        )
+        if existing is not None and not upload.replace:
+            raise UploadError(
+                f"The product already has a {upload.image_type} image.", status=409,
+            )
+
+    product_image = existing or ProductImage(product=upload.product, image_type=upload.image_type)
+    if upload.alt_text:
+        product_image.alt_text = upload.alt_text
+    if upload.display_order is not None:
+        product_image.display_order = upload.display_order
+    elif existing is None:
+        last = upload.product.images.aggregate(last=Max('display_order'))['last']
+        product_image.display_order = 0 if last is None else last + 1
+
+    with open(path, 'rb') as f:
+        product_image.image.save(os.path.basename(upload.filename), File(f), save=False)
+    try:
+        # A savepoint, so the caller's transaction survives a conflict
+        with transaction.atomic():
+            product_image.save()
+    except IntegrityError:
+        # Another image of this type was attached since the check above
+        product_image.image.storage.delete(product_image.image.name)
+        raise UploadError(
+            f"The product already has a {upload.image_type} image.", status=409,
+        )
+
+    upload.status = 'complete'
+    upload.product_image = product_image
+    upload.save(update_fields=['status', 'product_image', 'date_updated'])
+    transaction.on_commit(partial(remove_chunk_file, path))
+    return product_image
+
+
+def remove_chunk_file(path):
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def discard_upload(upload):
+    remove_chunk_file(chunk_path(upload))
+    upload.delete()
+
+
+def discard_stale_uploads(cutoff):
+    """
+    Discard pending uploads last touched before cutoff, and remove partial
+    files as old as that which no pending upload owns.
+    """
+    stale = ImageUpload.objects.filter(status='pending', date_updated__lt=cutoff)
+    discarded = 0
+    for upload_id in list(stale.values_list('upload_id', flat=True)):
+        with transaction.atomic():
+            # Skip uploads that received a chunk in the meantime
+            upload = stale.select_for_update().filter(pk=upload_id).first()
+            if upload is not None:
+                discard_upload(upload)
+                discarded += 1
+
+    try:
+        names = os.listdir(settings.CHUNKED_UPLOAD_DIR)
+    except FileNotFoundError:
+        return discarded
+    pending = {
+        f"{upload_id}.part" for upload_id in
+        ImageUpload.objects.filter(status='pending').values_list('upload_id', flat=True)
+    }
+    for name in names:
+        path = os.path.join(settings.CHUNKED_UPLOAD_DIR, name)
+        if name.endswith('.part') and name not in pending and os.path.getmtime(path) < cutoff.timestamp():
+            remove_chunk_file(path)
+    return discarded
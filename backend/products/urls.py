@@ -1,10 +1,12 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ProductViewSet
+from .views import ProductViewSet, ImageUploadViewSet, LowStockReportView
 
 router = DefaultRouter()
 router.register(r'products', ProductViewSet)
+router.register(r'uploads', ImageUploadViewSet)
 
 urlpatterns = [
     path('api/', include(router.urls)),
+    path('api/reports/low-stock/', LowStockReportView.as_view(), name='low-stock-report'),
 ]
\ No newline at end of file
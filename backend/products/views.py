@@ -1,20 +1,237 @@
-from django.shortcuts import render
-from rest_framework import viewsets
-from rest_framework.permissions import AllowAny
-from .models import Product
-from .serializers import ProductSerializer
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.db.models import Prefetch
+from django.shortcuts import get_object_or_404, render
+from django.utils.cache import patch_cache_control
+from rest_framework import mixins, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import AllowAny, IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from .cache import (
+    catalog_version, detail_version, featured_version, get_cached_detail, get_cached_facets,
+    get_cached_featured, set_cached_detail, set_cached_facets, set_cached_featured,
+)
+from .facets import DEFAULT_BUCKETS, MAX_BUCKETS, compute_facets
+from .models import (
+    ImageUpload, Product, ProductCategory, ProductGroup, ProductGroupMember, ProductImage, ProductVariant,
+)
+from .reports import LOW_STOCK_COLUMNS, low_stock_csv_response, low_stock_report
+from .serializers import (
+    FeaturedProductSerializer, ImageUploadSerializer, ImageUploadUpdateSerializer, ProductDetailSerializer,
+    ProductImageSerializer, ProductSerializer,
+)
+from .tasks import schedule_upload_cleanup
+from .uploads import InvalidImage, UploadError, append_chunk, complete_upload, discard_upload, parse_content_range
+
+# Product columns read to build each key of the list representation
+FIELD_COLUMNS = {
+    'id': ['product_id'],
+    'name': ['product_name'],
+    'price': ['base_price'],
+    'description': ['description'],
+}
+IMAGE_FIELDS = {'image', 'secondaryImage', 'images'}
+# Actions that render the list representation and honour sparse fieldsets
+LIST_ACTIONS = ('list', 'batch')
+BATCH_LIMIT = 100
+FILTER_PARAMS = ('category', 'min_price', 'max_price', 'search')
+# Browser cache lifetime of featured groups; the server side cache is
+# invalidated on change, but clients may see a change this much later
+FEATURED_MAX_AGE = 60
+
+
+def parse_price(name, value):
+    try:
+        price = Decimal(value)
+    except InvalidOperation:
+        price = None
+    if price is None or not price.is_finite():
+        raise ValidationError({name: "Must be a number."})
+    return price
+
 
 class ProductViewSet(viewsets.ReadOnlyModelViewSet):
     """
     API endpoint that allows products to be viewed.
+
+    Supports sparse fieldsets: ?fields=id,name,price,image limits the
+    output to those keys; nested relations such as images are only
+    included when listed. On the list, unused columns are deferred and the
+    image and category prefetches are skipped when not needed.
     """
     queryset = Product.objects.filter(is_active=True)
     serializer_class = ProductSerializer
     permission_classes = [AllowAny]
+    # Includes the query loading the user when the request is authenticated
+    query_budget = {'list': 3, 'retrieve': 6, 'batch': 4, 'facets': 4, 'featured': 4}
+
+    def get_requested_fields(self):
+        """
+        Return the set of representation keys requested through the
+        fields query parameter, or None for the full output.
+        """
+        if not hasattr(self, '_requested_fields'):
+            fields = self.request.query_params.get('fields')
+            if fields is None:
+                self._requested_fields = None
+            else:
+                requested = {name.strip() for name in fields.split(',') if name.strip()}
+                unknown = requested - set(self.get_serializer_class().REPRESENTATION_SOURCES)
+                if unknown:
+                    raise ValidationError({'fields': f"Unknown field(s): {', '.join(sorted(unknown))}"})
+                self._requested_fields = requested
+        return self._requested_fields
 
     def get_serializer_context(self):
         context = super().get_serializer_context()
+        # Detail responses are cached whole and trimmed in retrieve()
+        if self.action in LIST_ACTIONS:
+            context['fields'] = self.get_requested_fields()
         return context
+
+    def get_serializer_class(self):
+        if self.action == 'retrieve':
+            return ProductDetailSerializer
+        return ProductSerializer
+
+    def retrieve(self, request, *args, **kwargs):
+        """
+        Return the full product representation, served from the cache
+        when possible. Cache entries are invalidated by products.signals.
+        """
+        try:
+            product_id = int(kwargs[self.lookup_field])
+        except (KeyError, ValueError):
+            product_id = None
+        base_url = request.build_absolute_uri('/')
+
+        requested = self.get_requested_fields()
+
+        data = version = None
+        if product_id is not None:
+            version = detail_version(product_id)
+            data = get_cached_detail(product_id, base_url, version)
+        if data is None:
+            instance = self.get_object()
+            data = self.get_serializer(instance).data
+            set_cached_detail(instance.pk, base_url, data, version)
+
+        if requested is not None:
+            data = {key: value for key, value in data.items() if key in requested}
+        return Response(data)
+
+    @action(detail=False, methods=['get'])
+    def batch(self, request):
+        """
+        Look up several products at once by ?ids=1,2,3 and/or
+        ?skus=SKU-A,SKU-B (variant SKUs). Products are returned in the
+        order requested, ids first, and anything not found is reported
+        under 'missing'.
+        """
+        ids = self.parse_list_param('ids')
+        skus = self.parse_list_param('skus')
+        if len(ids) + len(skus) > BATCH_LIMIT:
+            raise ValidationError({'detail': f"At most {BATCH_LIMIT} ids and skus can be requested at once."})
+        try:
+            ids = [int(product_id) for product_id in ids]
+        except ValueError:
+            raise ValidationError({'ids': "Product ids must be integers."})
+
+        sku_products = dict(
+            ProductVariant.objects.filter(sku__in=skus, is_active=True)
+            .values_list('sku', 'product_id')
+        ) if skus else {}
+        wanted = ids + [sku_products[sku] for sku in skus if sku in sku_products]
+        products = {
+            product.pk: product
+            for product in self.get_queryset().filter(product_id__in=wanted)
+        }
+
+        ordered = []
+        seen = set()
+        for product_id in wanted:
+            if product_id in products and product_id not in seen:
+                seen.add(product_id)
+                ordered.append(products[product_id])
+
+        return Response({
+            'results': self.get_serializer(ordered, many=True).data,
+            'missing': {
+                'ids': [product_id for product_id in ids if product_id not in products],
+                'skus': [sku for sku in skus if sku_products.get(sku) not in products],
+            },
+        })
+
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        """
+        Product count, price range, price histogram (?buckets=N) and
+        per-category counts for the products matching the current
+        filters. Cached per filter combination.
+        """
+        try:
+            buckets = int(request.query_params.get('buckets', DEFAULT_BUCKETS))
+        except ValueError:
+            raise ValidationError({'buckets': "Must be an integer."})
+        if not 1 <= buckets <= MAX_BUCKETS:
+            raise ValidationError({'buckets': f"Must be between 1 and {MAX_BUCKETS}."})
+
+        params = {name: request.query_params.get(name) for name in FILTER_PARAMS}
+        params['buckets'] = buckets
+        version = catalog_version()
+        data = get_cached_facets(params, version)
+        if data is None:
+            queryset = self.get_queryset()
+            category_queryset = self.filter_products(
+                Product.objects.filter(is_active=True), skip=('category',)
+            )
+            data = compute_facets(queryset, category_queryset, buckets)
+            set_cached_facets(params, data, version)
+        return Response(data)
+
+    @action(detail=False, methods=['get'], url_path=r'featured/(?P<group_name>[^/.]+)')
+    def featured(self, request, group_name=None):
+        """
+        The active products of an active product group (e.g. 'hero' for
+        the landing page carousel) in display order, with the URLs of their
+        resized images. Precomputed by products.tasks.refresh_featured_groups
+        and cached until the group, its members or their products change.
+        """
+        base_url = request.build_absolute_uri('/')
+        version = featured_version()
+        data = get_cached_featured(group_name, base_url, version)
+        if data is None:
+            group = get_object_or_404(ProductGroup, group_name=group_name, is_active=True)
+            members = (
+                group.members.filter(product__is_active=True)
+                .select_related('product')
+                .prefetch_related(
+                    Prefetch(
+                        'product__images',
+                        queryset=ProductImage.objects.order_by('display_order', 'image_id'),
+                    )
+                )
+                .order_by('display_order', 'member_id')
+            )
+            data = {
+                'group': group.group_name,
+                'description': group.description,
+                'results': FeaturedProductSerializer(
+                    members, many=True, context=self.get_serializer_context()
+                ).data,
+            }
+            set_cached_featured(group_name, base_url, data, version)
+
+        response = Response(data)
+        patch_cache_control(response, public=True, max_age=FEATURED_MAX_AGE)
+        return response
+
+    def parse_list_param(self, name):
+        value = self.request.query_params.get(name, '')
+        return [item.strip() for item in value.split(',') if item.strip()]
     
     def get_queryset(self):
         """
@@ -22,18 +239,177 @@ class ProductViewSet(viewsets.ReadOnlyModelViewSet):
         against query parameters in the URL.
         """
         queryset = Product.objects.filter(is_active=True)
-        category = self.request.query_params.get('category', None)
-        min_price = self.request.query_params.get('min_price', None)
-        max_price = self.request.query_params.get('max_price', None)
-        search = self.request.query_params.get('search', None)
+        if self.action == 'facets':
+            return self.filter_products(queryset)
+        requested = self.get_requested_fields() if self.action in LIST_ACTIONS else None
+
+        if requested is None or requested & IMAGE_FIELDS:
+            queryset = queryset.prefetch_related(
+                Prefetch('images', queryset=ProductImage.objects.order_by('display_order', 'image_id'))
+            )
+        if requested is not None:
+            queryset = queryset.only(
+                'product_id',
+                *(column for key in requested for column in FIELD_COLUMNS.get(key, [])),
+            )
+        if requested is None or 'category' in requested:
+            queryset = queryset.prefetch_related(
+                Prefetch(
+                    'productcategory_set',
+                    queryset=ProductCategory.objects.filter(category__is_active=True)
+                    .select_related('category')
+                    .order_by('category__category_name'),
+                )
+            )
+        if self.action == 'retrieve':
+            queryset = queryset.prefetch_related(
+                Prefetch(
+                    'variants',
+                    queryset=ProductVariant.objects.filter(is_active=True)
+                    .select_related('size')
+                    .order_by('size__display_order', 'variant_id'),
+                ),
+                Prefetch(
+                    'productgroupmember_set',
+                    queryset=ProductGroupMember.objects.filter(group__is_active=True)
+                    .select_related('group')
+                    .order_by('display_order', 'member_id'),
+                ),
+            )
+
+        return self.filter_products(queryset)
+
+    def filter_products(self, queryset, skip=()):
+        """
+        Apply the category/min_price/max_price/search query parameters,
+        except those named in skip.
+        """
+        params = {
+            name: self.request.query_params.get(name, None)
+            for name in FILTER_PARAMS if name not in skip
+        }
+        category = params.get('category')
+        min_price = params.get('min_price')
+        max_price = params.get('max_price')
+        search = params.get('search')
         
         if category:
-            queryset = queryset.filter(category__iexact=category)
+            queryset = queryset.filter(productcategory__category__category_name__iexact=category)
         if min_price:
-            queryset = queryset.filter(base_price__gte=float(min_price))
+            queryset = queryset.filter(base_price__gte=parse_price('min_price', min_price))
         if max_price:
-            queryset = queryset.filter(base_price__lte=float(max_price))
+            queryset = queryset.filter(base_price__lte=parse_price('max_price', max_price))
         if search:
             queryset = queryset.filter(product_name__icontains=search)
             
-        return queryset
\ No newline at end of file
+        return queryset
+
+class LowStockReportView(APIView):
+    """
+    Variants at or below their reorder threshold, grouped by product and size.
+    Pass ?export=csv to stream the report as a CSV download.
+    """
+    permission_classes = [IsAdminUser]
+    query_budget = 2
+
+    def get(self, request):
+        if request.query_params.get('export') == 'csv':
+            return low_stock_csv_response()
+        keys = [key for key, _ in LOW_STOCK_COLUMNS]
+        rows = [
+            {key.split('__')[-1]: row[key] for key in keys}
+            for row in low_stock_report()
+        ]
+        return Response(rows)
+
+class ImageUploadViewSet(mixins.CreateModelMixin,
+                         mixins.RetrieveModelMixin,
+                         mixins.DestroyModelMixin,
+                         viewsets.GenericViewSet):
+    """
+    Chunked, resumable product image uploads for catalog managers.
+
+    1. POST /api/uploads/ with product, filename, total_size and image_type
+    2. PUT each chunk's raw bytes to /api/uploads/<id>/chunk/ with a
+       Content-Range header (bytes start-end/total), in order
+    3. POST /api/uploads/<id>/complete/ to validate and attach the image
+
+    GET /api/uploads/<id>/ reports received_size, the offset to resume from.
+    PATCH /api/uploads/<id>/ changes image_type, alt_text, display_order or
+    replace before completing, e.g. to retry after a 409 for an existing
+    primary image. An upload whose file is not a valid image is discarded.
+    """
+    queryset = ImageUpload.objects.all()
+    serializer_class = ImageUploadSerializer
+    permission_classes = [IsAdminUser]
+    query_budget = {
+        'create': 5, 'retrieve': 2, 'partial_update': 3, 'destroy': 3, 'chunk': 3, 'complete': 10,
+    }
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ('partial_update', 'chunk', 'complete'):
+            # Lock the row so concurrent requests can't both append or
+            # both attach the image
+            queryset = queryset.select_for_update()
+        return queryset
+
+    def get_serializer_class(self):
+        if self.action == 'partial_update':
+            return ImageUploadUpdateSerializer
+        return super().get_serializer_class()
+
+    def perform_create(self, serializer):
+        serializer.save(created_by=self.request.user)
+        schedule_upload_cleanup()
+
+    def partial_update(self, request, *args, **kwargs):
+        with transaction.atomic():
+            upload = self.get_object()
+            if upload.status != 'pending':
+                return Response({'error': "Upload is already complete."}, status=status.HTTP_409_CONFLICT)
+            serializer = self.get_serializer(upload, data=request.data, partial=True)
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+        return Response(serializer.data)
+
+    def perform_destroy(self, instance):
+        discard_upload(instance)
+
+    def error_response(self, error):
+        return Response({'error': str(error), **error.extra}, status=error.status)
+
+    @action(detail=True, methods=['put'])
+    def chunk(self, request, pk=None):
+        content_range = request.headers.get('Content-Range')
+        try:
+            with transaction.atomic():
+                upload = self.get_object()
+                if upload.status != 'pending':
+                    raise UploadError("Upload is already complete.", status=409)
+                if content_range:
+                    start, length = parse_content_range(content_range, upload)
+                else:
+                    start, length = upload.received_size, int(request.headers.get('Content-Length') or 0)
+                # Read the raw body directly; request.data would buffer it
+                append_chunk(upload, request.stream, start, length)
+        except UploadError as e:
+            return self.error_response(e)
+        return Response({'upload_id': upload.upload_id, 'received_size': upload.received_size})
+
+    @action(detail=True, methods=['post'])
+    def complete(self, request, pk=None):
+        try:
+            with transaction.atomic():
+                upload = self.get_object()
+                product_image = complete_upload(upload)
+        except InvalidImage as e:
+            # Completing can never succeed, so don't leave the file behind
+            discard_upload(upload)
+            return self.error_response(e)
+        except UploadError as e:
+            return self.error_response(e)
+        return Response(
+            ProductImageSerializer(product_image, context=self.get_serializer_context()).data,
+            status=status.HTTP_201_CREATED,
+        )
\ No newline at end of file
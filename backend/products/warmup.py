@@ -0,0 +1,136 @@
+"""
+Cache warm-up for new server processes.
+
+ProductsConfig.ready() connects warm_catalog_cache to
+daynovadev.startup.application_ready, so it runs once the application is
+fully loaded and never for management commands. Entries are built by
+ProductViewSet itself, so they are exactly what requests would have cached,
+and entries already present (e.g. warmed by another worker sharing the
+cache) are left alone.
+
+Base URLs whose host ALLOWED_HOSTS rejects are skipped with a warning
+(and reported by the products.W001 check), since real requests for them
+would be rejected too.
+"""
+import logging
+from io import BytesIO
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.exceptions import DisallowedHost
+from django.core.handlers.wsgi import WSGIRequest
+
+from .cache import detail_version, get_cached_detail, set_cached_detail
+from .models import Product, ProductGroup, ProductGroupMember
+from .views import ProductViewSet
+
+logger = logging.getLogger(__name__)
+
+
+def build_request(base_url, path='/'):
+    """A GET request for path as if it came in on base_url."""
+    url = urlsplit(base_url)
+    return WSGIRequest({
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': '',
+        'HTTP_HOST': url.netloc,
+        'SERVER_NAME': url.hostname,
+        'SERVER_PORT': str(url.port or (443 if url.scheme == 'https' else 80)),
+        'wsgi.url_scheme': url.scheme,
+        'wsgi.input': BytesIO(),
+    })
+
+
+def disallowed_base_urls():
+    """The CATALOG_WARMUP_BASE_URLS whose host is not in ALLOWED_HOSTS."""
+    disallowed = []
+    for base_url in settings.CATALOG_WARMUP_BASE_URLS:
+        try:
+            build_request(base_url).get_host()
+        except DisallowedHost:
+            disallowed.append(base_url)
+    return disallowed
+
+
+def warmup_requests():
+    """A request for each usable base URL in CATALOG_WARMUP_BASE_URLS."""
+    disallowed = disallowed_base_urls()
+    for base_url in disallowed:
+        logger.warning("Not warming the cache for %s: its host is not in ALLOWED_HOSTS", base_url)
+    return [
+        build_request(base_url) for base_url in settings.CATALOG_WARMUP_BASE_URLS
+        if base_url not in disallowed
+    ]
+
+
+def product_view(action, request):
+    """A ProductViewSet set up as if it were handling request."""
+    view = ProductViewSet(action_map={'get': action}, format_kwarg=None)
+    view.setup(request)
+    view.request = view.initialize_request(request)
+    return view
+
+
+def hot_product_ids(limit):
+    """Products in active groups (the home page sections), then the newest."""
+    featured = (
+        ProductGroupMember.objects
+        .filter(group__is_active=True, product__is_active=True)
+        .order_by('group_id', 'display_order', 'member_id')
+        .values_list('product_id', flat=True)
+    )
+    product_ids = list(dict.fromkeys(featured))[:limit]
+    if len(product_ids) < limit:
+        product_ids += (
+            Product.objects.filter(is_active=True)
+            .exclude(pk__in=product_ids)
+            .order_by('-date_created')
+            .values_list('product_id', flat=True)[:limit - len(product_ids)]
+        )
+    return product_ids
+
+
+def warm_facets(request):
+    """Cache the facets of the unfiltered catalog."""
+    view = product_view('facets', request)
+    view.facets(view.request)
+
+
+def warm_product_details(request, product_ids):
+    """Cache the detail representation of the given products."""
+    base_url = request.build_absolute_uri('/')
+    versions = {product_id: detail_version(product_id) for product_id in product_ids}
+    missing = [
+        product_id for product_id, version in versions.items()
+        if get_cached_detail(product_id, base_url, version) is None
+    ]
+    if not missing:
+        return
+    view = product_view('retrieve', request)
+    for product in view.get_queryset().filter(product_id__in=missing):
+        set_cached_detail(product.pk, base_url, view.get_serializer(product).data, versions[product.pk])
+
+
+def warm_featured_groups(requests=None):
+    """Cache every active featured group, for each of the warm-up base URLs."""
+    if requests is None:
+        requests = warmup_requests()
+    group_names = list(ProductGroup.objects.filter(is_active=True).values_list('group_name', flat=True))
+    for request in requests:
+        view = product_view('featured', request)
+        for group_name in group_names:
+            view.featured(view.request, group_name=group_name)
+
+
+def warm_catalog_cache(**kwargs):
+    if not settings.CATALOG_WARMUP:
+        return
+    requests = warmup_requests()
+    if not requests:
+        return
+    warm_featured_groups(requests)
+    warm_facets(requests[0])
+    product_ids = hot_product_ids(settings.CATALOG_WARMUP_PRODUCTS)
+    for request in requests:
+        warm_product_details(request, product_ids)
@@ -0,0 +1,21 @@
+from django.contrib import admin
+from django.utils import timezone
+from .models import Task
+from .worker import requeue
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ('task_id', 'name', 'status', 'attempts', 'max_attempts', 'run_after', 'date_updated')
+    list_filter = ('status', 'name')
+    search_fields = ('name', 'dedup_key')
+    readonly_fields = ('last_error', 'date_created', 'date_updated')
+    actions = ['retry_tasks']
+
+    @admin.action(description='Retry selected failed tasks')
+    def retry_tasks(self, request, queryset):
+        # One at a time: a failed task is skipped if the same work is already pending
+        updated = sum(
+            requeue(task_id, 'failed', attempts=0, run_after=timezone.now())
+            for task_id in queryset.filter(status='failed').values_list('task_id', flat=True)
+        )
+        self.message_user(request, f"{updated} task(s) queued for retry.")
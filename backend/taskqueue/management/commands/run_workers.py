@@ -0,0 +1,94 @@
+import multiprocessing
+import time
+from multiprocessing.connection import wait
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+# Models are only imported once Django is set up (see setup_worker), since
+# under the spawn start method children import this module from scratch
+
+# Seconds to wait before replacing a worker that died, so a worker that
+# crashes on startup doesn't turn into a busy loop
+RESTART_DELAY = 1.0
+
+
+def setup_worker():
+    # Spawned children (the default on macOS and Windows) start from a
+    # fresh interpreter; with fork this is a no-op
+    django.setup()
+
+
+def worker_process(poll_interval, once, lock_timeout, processed):
+    setup_worker()
+    from taskqueue.worker import work
+
+    # Each process opens its own database connection on first use
+    count = work(poll_interval=poll_interval, once=once, lock_timeout=lock_timeout)
+    with processed.get_lock():
+        processed.value += count
+
+
+def start_worker(args):
+    process = multiprocessing.Process(target=worker_process, args=args)
+    process.start()
+    return process
+
+
+class Command(BaseCommand):
+    help = "Run background task workers in supervised processes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('-p', '--processes', type=int, default=2,
+                            help="Number of worker processes.")
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help="Seconds to wait between polls of an empty queue.")
+        parser.add_argument('--lock-timeout', type=int, default=600,
+                            help="Seconds after which a running task is considered abandoned.")
+        parser.add_argument('--once', action='store_true',
+                            help="Exit once the queue has no due tasks.")
+
+    def handle(self, *args, **options):
+        from taskqueue.worker import requeue_stale_tasks, work
+
+        requeued = requeue_stale_tasks(options['lock_timeout'])
+        if requeued:
+            self.stdout.write(f"Requeued {requeued} abandoned task(s)")
+
+        processes = options['processes']
+        if processes <= 1:
+            processed = work(options['poll_interval'], options['once'], options['lock_timeout'])
+        else:
+            # Connections must not be shared with forked children
+            connections.close_all()
+            processed = self.supervise(processes, options)
+
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} task(s)"))
+
+    def supervise(self, count, options):
+        """
+        Run count worker processes until they finish (with --once) or the
+        command is stopped, replacing any that die. The task a dead worker
+        was running is picked up again once its lock times out.
+        """
+        processed = multiprocessing.Value('i', 0)
+        args = (options['poll_interval'], options['once'], options['lock_timeout'], processed)
+        workers = [start_worker(args) for _ in range(count)]
+        try:
+            while workers:
+                wait([worker.sentinel for worker in workers])
+                for worker in [worker for worker in workers if not worker.is_alive()]:
+                    workers.remove(worker)
+                    worker.join()
+                    if worker.exitcode != 0:
+                        self.stderr.write(
+                            f"Worker {worker.pid} exited with code {worker.exitcode}, starting a new one"
+                        )
+                        time.sleep(RESTART_DELAY)
+                        workers.append(start_worker(args))
+        finally:
+            for worker in workers:
+                worker.terminate()
+                worker.join()
+        return processed.value
@@ -0,0 +1,51 @@
+# models.py for taskqueue
+from django.db import models
+
+
+class Task(models.Model):
+    """
+    A unit of background work, stored in the database and executed by
+    the run_workers management command.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    task_id = models.AutoField(primary_key=True)
+    # Dotted path of the @task function to run
+    name = models.CharField(max_length=255)
+    args = models.JSONField(default=list, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    # At most one pending task may exist per dedup key
+    dedup_key = models.CharField(max_length=255, null=True, blank=True)
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=3)
+    run_after = models.DateTimeField()
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(null=True, blank=True)
+    date_created = models.DateTimeField(auto_now_add=True)
+    date_updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dedup_key'],
+                condition=models.Q(status='pending'),
+                name='unique_pending_dedup_key'
+            )
+        ]
+        indexes = [
+            # Workers poll for due pending tasks
+            models.Index(
+                fields=['run_after'],
+                condition=models.Q(status='pending'),
+                name='pending_task_idx'
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.status})"
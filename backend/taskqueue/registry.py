@@ -0,0 +1,80 @@
+"""
+Declaring and enqueueing background tasks.
+
+    from taskqueue.registry import task
+
+    @task(max_attempts=5)
+    def send_welcome_email(user_id):
+        ...
+
+    send_welcome_email.enqueue(user.pk, dedup_key=f'welcome-email:{user.pk}')
+
+Arguments are stored as JSON, so pass ids rather than model instances.
+"""
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Task
+
+_registry = {}
+
+
+def task(func=None, *, max_attempts=3):
+    """Register func as a background task and give it an enqueue() method."""
+    def decorator(func):
+        name = f"{func.__module__}.{func.__qualname__}"
+        _registry[name] = func
+
+        def enqueue(*args, dedup_key=None, delay=None, **kwargs):
+            return enqueue_task(
+                name, args, kwargs,
+                dedup_key=dedup_key, delay=delay, max_attempts=max_attempts,
+            )
+
+        func.task_name = name
+        func.enqueue = enqueue
+        return func
+
+    if func is not None:
+        return decorator(func)
+    return decorator
+
+
+def get_task_function(name):
+    if name not in _registry:
+        # Importing the module registers the task
+        import_string(name)
+    return _registry[name]
+
+
+def enqueue_task(name, args=(), kwargs=None, dedup_key=None, delay=None, max_attempts=3):
+    """
+    Store a task for the workers to run. When a pending task with the
+    same dedup_key already exists, that task is returned instead.
+    """
+    run_after = timezone.now()
+    if delay is not None:
+        run_after += delay if isinstance(delay, timedelta) else timedelta(seconds=delay)
+
+    fields = {
+        'name': name,
+        'args': list(args),
+        'kwargs': kwargs or {},
+        'run_after': run_after,
+        'max_attempts': max_attempts,
+    }
+    if dedup_key is None:
+        return Task.objects.create(**fields)
+
+    try:
+        with transaction.atomic():
+            return Task.objects.create(dedup_key=dedup_key, **fields)
+    except IntegrityError:
+        existing = Task.objects.filter(dedup_key=dedup_key, status='pending').first()
+        if existing is None:
+            # The pending task was claimed in the meantime; queue a new one
+            return Task.objects.create(dedup_key=dedup_key, **fields)
+        return existing
@@ -0,0 +1,146 @@
+import multiprocessing
+import os
+import unittest
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+
+from .management.commands import run_workers
+from .models import Task
+from .registry import task
+from .worker import RETRY_BASE_DELAY, claim_task, requeue_stale_tasks, run_task, work
+
+calls = []
+
+
+@task
+def record_call(value):
+    calls.append(value)
+
+
+@task
+def always_fail():
+    raise RuntimeError("boom")
+
+
+class EnqueueTests(TestCase):
+    def test_dedup_key_returns_pending_task(self):
+        first = record_call.enqueue(1, dedup_key='k')
+        second = record_call.enqueue(2, dedup_key='k')
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(Task.objects.count(), 1)
+
+    def test_dedup_key_queues_again_once_claimed(self):
+        first = record_call.enqueue(1, dedup_key='k')
+        claim_task()
+        second = record_call.enqueue(2, dedup_key='k')
+        self.assertNotEqual(first.pk, second.pk)
+
+
+class RunTaskTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_success(self):
+        record_call.enqueue('x')
+        self.assertEqual(run_task(claim_task()), 'done')
+        self.assertEqual(calls, ['x'])
+
+    def test_failure_is_retried_with_backoff(self):
+        always_fail.enqueue()
+        before = timezone.now()
+        self.assertEqual(run_task(claim_task()), 'pending')
+
+        task_obj = Task.objects.get()
+        self.assertEqual(task_obj.status, 'pending')
+        self.assertEqual(task_obj.attempts, 1)
+        self.assertIsNone(task_obj.locked_at)
+        self.assertIn('boom', task_obj.last_error)
+        self.assertGreaterEqual(task_obj.run_after, before + timedelta(seconds=RETRY_BASE_DELAY))
+
+    def test_failure_after_max_attempts(self):
+        always_fail.enqueue()
+        Task.objects.update(attempts=2)
+        self.assertEqual(run_task(claim_task()), 'failed')
+        self.assertEqual(Task.objects.get().status, 'failed')
+
+    def test_failed_retry_defers_to_pending_duplicate(self):
+        first = always_fail.enqueue(dedup_key='k')
+        run_target = claim_task()
+        second = always_fail.enqueue(dedup_key='k')
+
+        self.assertEqual(run_task(run_target), 'failed')
+        first.refresh_from_db()
+        second.refresh_from_db()
+        self.assertEqual(first.status, 'failed')
+        self.assertIsNone(first.locked_at)
+        self.assertEqual(second.status, 'pending')
+
+
+class RequeueStaleTasksTests(TestCase):
+    def make_stale(self, task_obj):
+        Task.objects.filter(pk=task_obj.pk).update(
+            status='running', locked_at=timezone.now() - timedelta(hours=1)
+        )
+
+    def test_stale_task_is_requeued(self):
+        task_obj = record_call.enqueue(1, dedup_key='k')
+        self.make_stale(task_obj)
+        self.assertEqual(requeue_stale_tasks(60), 1)
+        task_obj.refresh_from_db()
+        self.assertEqual(task_obj.status, 'pending')
+
+    def test_recent_task_is_left_running(self):
+        record_call.enqueue(1)
+        claim_task()
+        self.assertEqual(requeue_stale_tasks(60), 0)
+        self.assertEqual(Task.objects.get().status, 'running')
+
+    def test_stale_task_with_pending_duplicate_is_failed(self):
+        stale = record_call.enqueue(1, dedup_key='k')
+        self.make_stale(stale)
+        pending = record_call.enqueue(2, dedup_key='k')
+
+        self.assertEqual(requeue_stale_tasks(60), 0)
+        stale.refresh_from_db()
+        pending.refresh_from_db()
+        self.assertEqual(stale.status, 'failed')
+        self.assertEqual(pending.status, 'pending')
+
+
+class WorkTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_abandoned_tasks_are_requeued_while_polling(self):
+        task_obj = record_call.enqueue(1)
+        Task.objects.filter(pk=task_obj.pk).update(
+            status='running', locked_at=timezone.now() - timedelta(hours=1)
+        )
+        self.assertEqual(work(once=True), 0)
+        self.assertEqual(work(once=True, lock_timeout=60), 1)
+        self.assertEqual(calls, [1])
+
+
+def crash_first_worker(poll_interval, once, lock_timeout, processed):
+    # Counts the workers started; the first one dies like an OOM-killed process
+    with processed.get_lock():
+        processed.value += 1
+        first = processed.value == 1
+    if first:
+        os._exit(1)
+
+
+@unittest.skipUnless(multiprocessing.get_start_method() == 'fork', "patches the worker in forked children")
+class SuperviseTests(TestCase):
+    @mock.patch.object(run_workers, 'RESTART_DELAY', 0)
+    @mock.patch.object(run_workers, 'worker_process', crash_first_worker)
+    def test_dead_workers_are_replaced(self):
+        stderr = StringIO()
+        command = run_workers.Command(stdout=StringIO(), stderr=stderr)
+        options = {'poll_interval': 0.01, 'once': True, 'lock_timeout': 60}
+        self.assertEqual(command.supervise(2, options), 3)
+        self.assertIn("exited with code 1", stderr.getvalue())
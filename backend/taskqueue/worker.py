@@ -0,0 +1,134 @@
+"""
+Task execution. Workers claim tasks with a conditional UPDATE, so any
+number of worker processes can share the queue on any database backend.
+"""
+import logging
+import time
+import traceback
+from datetime import timedelta
+
+from django.db import IntegrityError, close_old_connections, transaction
+from django.utils import timezone
+
+from .models import Task
+from .registry import get_task_function
+
+logger = logging.getLogger(__name__)
+
+RETRY_BASE_DELAY = 10  # seconds, doubled after every failed attempt
+STALE_CHECK_INTERVAL = 60  # seconds between checks for abandoned tasks
+
+
+def requeue(task_id, from_status, **fields):
+    """
+    Move a task in from_status back to pending. Returns False, leaving the
+    task as it was, when another task with the same dedup_key is already
+    pending; that task will do the same work.
+    """
+    try:
+        with transaction.atomic():
+            return bool(
+                Task.objects.filter(task_id=task_id, status=from_status)
+                .update(status='pending', **fields)
+            )
+    except IntegrityError:
+        return False
+
+
+def requeue_stale_tasks(lock_timeout):
+    """Return tasks left running by a worker that died back to the queue."""
+    cutoff = timezone.now() - timedelta(seconds=lock_timeout)
+    stale = Task.objects.filter(status='running', locked_at__lt=cutoff).values_list('task_id', flat=True)
+    requeued = 0
+    for task_id in list(stale):
+        if requeue(task_id, 'running', locked_at=None):
+            requeued += 1
+        else:
+            Task.objects.filter(task_id=task_id, status='running').update(
+                status='failed', locked_at=None,
+                last_error="Abandoned by its worker; a task with the same dedup key is pending.",
+            )
+    return requeued
+
+
+def claim_task():
+    """Claim the next due task, or return None if there is nothing to do."""
+    now = timezone.now()
+    candidates = (
+        Task.objects.filter(status='pending', run_after__lte=now)
+        .order_by('run_after', 'task_id')
+        .values_list('task_id', flat=True)[:10]
+    )
+    for task_id in candidates:
+        # Only one worker's UPDATE can match while the task is still pending
+        claimed = Task.objects.filter(task_id=task_id, status='pending').update(
+            status='running', locked_at=now, date_updated=now
+        )
+        if claimed:
+            return Task.objects.get(task_id=task_id)
+    return None
+
+
+def run_task(task):
+    """Run a claimed task and record the outcome, scheduling a retry on failure."""
+    task.attempts += 1
+    try:
+        func = get_task_function(task.name)
+        func(*task.args, **task.kwargs)
+    except Exception:
+        task.last_error = traceback.format_exc()
+        if task.attempts < task.max_attempts:
+            task.run_after = timezone.now() + timedelta(
+                seconds=RETRY_BASE_DELAY * 2 ** (task.attempts - 1)
+            )
+            retried = requeue(
+                task.task_id, 'running',
+                attempts=task.attempts, run_after=task.run_after, locked_at=None,
+                last_error=task.last_error, date_updated=timezone.now(),
+            )
+            if retried:
+                logger.warning("Task %s (%s) failed, retrying", task.task_id, task.name)
+                task.status = 'pending'
+                task.locked_at = None
+                return task.status
+            # The same work was queued again while this task ran
+            logger.warning(
+                "Task %s (%s) failed, not retried: a task with the same dedup key is pending",
+                task.task_id, task.name,
+            )
+        else:
+            logger.error("Task %s (%s) failed permanently", task.task_id, task.name)
+        task.status = 'failed'
+    else:
+        task.status = 'done'
+        task.last_error = None
+    task.locked_at = None
+    task.save(update_fields=['status', 'attempts', 'run_after', 'locked_at', 'last_error', 'date_updated'])
+    return task.status
+
+
+def work(poll_interval=1.0, once=False, lock_timeout=None):
+    """
+    Process tasks until interrupted. With once=True, return as soon as
+    the queue has no due tasks. Returns the number of tasks processed.
+
+    With a lock_timeout, tasks left running for longer than that (by a
+    worker that died) are returned to the queue every STALE_CHECK_INTERVAL.
+    """
+    processed = 0
+    next_stale_check = time.monotonic()
+    while True:
+        close_old_connections()
+        if lock_timeout is not None and time.monotonic() >= next_stale_check:
+            requeued = requeue_stale_tasks(lock_timeout)
+            if requeued:
+                logger.warning("Requeued %s abandoned task(s)", requeued)
+            next_stale_check = time.monotonic() + STALE_CHECK_INTERVAL
+        task = claim_task()
+        if task is None:
+            if once:
+                return processed
+            time.sleep(poll_interval)
+            continue
+        run_task(task)
+        processed += 1
@@ -164,7 +164,7 @@ const ProductDetail: React.FC<ProductDetailProps> = ({ product, loading }) => {
             <div className="space-y-4">
               <h3 className="font-nav text-lg">Details</h3>
               <ul className="space-y-2 font-nav text-gray-300">
-                <li>Category: {product.category}</li>
+                {product.category && <li>Category: {product.category}</li>}
                 <li>Product ID: {product.id}</li>
                 {/* Add more details as needed */}
               </ul>
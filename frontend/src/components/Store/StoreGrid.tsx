@@ -33,6 +33,9 @@ const StoreGrid: React.FC<StoreGridProps> = ({
         if (filters.minPrice !== undefined) url.searchParams.append('min_price', filters.minPrice.toString());
         if (filters.maxPrice !== undefined) url.searchParams.append('max_price', filters.maxPrice.toString());
         if (filters.search) url.searchParams.append('search', filters.search);
+
+        // Only request what the grid renders to keep the payload small
+        url.searchParams.append('fields', 'id,name,price,image,secondaryImage,category');
         
         const response = await fetch(url.toString());
         
@@ -91,7 +94,7 @@ const StoreGrid: React.FC<StoreGridProps> = ({
           const searchLower = filters.search.toLowerCase();
           filteredMockProducts = filteredMockProducts.filter(p => 
             p.name.toLowerCase().includes(searchLower) || 
-            p.category.toLowerCase().includes(searchLower)
+            (p.category ?? '').toLowerCase().includes(searchLower)
           );
         }
         
@@ -44,6 +44,7 @@ const API_URL = 'http://localhost:8000/api';
 const LOGIN_URL = `${API_URL}/auth/login/`;
 const REGISTER_URL = `${API_URL}/auth/register/`;
 const REFRESH_URL = `${API_URL}/auth/token/refresh/`;
+const LOGOUT_URL = `${API_URL}/auth/logout/`;
 const PROFILE_URL = `${API_URL}/auth/profile/`;
 
 export const AuthProvider: React.FC<AuthProviderProps> = ({ children }) => {
@@ -165,6 +166,8 @@ export const AuthProvider: React.FC<AuthProviderProps> = ({ children }) => {
           'Content-Type': 'application/json',
         },
         body: JSON.stringify({ email, password }),
+        // Send the session cookie so the guest cart is merged into the user's
+        credentials: 'include',
       });
       
       if (!response.ok) {
@@ -241,6 +244,18 @@ export const AuthProvider: React.FC<AuthProviderProps> = ({ children }) => {
 
   // Logout function
   const logout = () => {
+    // Revoke the refresh token server-side; the UI doesn't wait for it
+    const refreshToken = localStorage.getItem('refreshToken');
+    if (refreshToken) {
+      fetch(LOGOUT_URL, {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({ refresh: refreshToken }),
+      }).catch(err => console.error('Logout request failed:', err));
+    }
+
     localStorage.removeItem('accessToken');
     localStorage.removeItem('refreshToken');
     setUser(null);
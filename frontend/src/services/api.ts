@@ -1,4 +1,5 @@
 import { Product } from '../components/Store/StoreGrid';
+import { Cart, FeaturedGroup } from '../types';
 
 export const API_URL = 'http://localhost:8000/api';
 
@@ -46,4 +47,66 @@ export const fetchProductById = async (id: number): Promise<Product> => {
     console.error(`Error fetching product with ID ${id}:`, error);
     throw error;
   }
-};
\ No newline at end of file
+};
+
+export const fetchProductsByIds = async (ids: number[]): Promise<{
+  results: Product[];
+  missing: { ids: number[]; skus: string[] };
+}> => {
+  try {
+    // One round trip for carts, wishlists and recently viewed lists
+    const url = new URL(`${API_URL}/products/batch/`);
+    url.searchParams.append('ids', ids.join(','));
+
+    const response = await fetch(url.toString());
+
+    if (!response.ok) {
+      throw new Error(`HTTP error! Status: ${response.status}`);
+    }
+
+    return await response.json();
+  } catch (error) {
+    console.error('Error fetching products by IDs:', error);
+    throw error;
+  }
+};
+
+export const fetchFeaturedGroup = async (groupName: string = 'hero'): Promise<FeaturedGroup> => {
+  try {
+    // Small cached response for the landing page carousels
+    const response = await fetch(`${API_URL}/products/featured/${encodeURIComponent(groupName)}/`);
+
+    if (!response.ok) {
+      throw new Error(`HTTP error! Status: ${response.status}`);
+    }
+
+    return await response.json();
+  } catch (error) {
+    console.error(`Error fetching featured group ${groupName}:`, error);
+    throw error;
+  }
+};
+
+// Guests' carts live in the server session, so cart requests must send the
+// session cookie; it is merged into the user's cart on login
+const cartRequest = async (init: RequestInit = {}, accessToken?: string): Promise<Cart> => {
+  const headers: Record<string, string> = { 'Content-Type': 'application/json' };
+  if (accessToken) {
+    headers['Authorization'] = `Bearer ${accessToken}`;
+  }
+  const response = await fetch(`${API_URL}/cart/`, { ...init, headers, credentials: 'include' });
+
+  if (!response.ok) {
+    throw new Error(`HTTP error! Status: ${response.status}`);
+  }
+
+  return await response.json();
+};
+
+export const fetchCart = (accessToken?: string): Promise<Cart> => cartRequest({}, accessToken);
+
+export const addToCart = (variantId: number, quantity: number = 1, accessToken?: string): Promise<Cart> =>
+  cartRequest({
+    method: 'POST',
+    body: JSON.stringify({ variant_id: variantId, quantity }),
+  }, accessToken);
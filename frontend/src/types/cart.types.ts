@@ -0,0 +1,15 @@
+export interface CartItem {
+  variant_id: number;
+  sku: string;
+  product_id: number;
+  product_name: string;
+  size: string;
+  unit_price: number;
+  quantity: number;
+}
+
+export interface Cart {
+  items: CartItem[];
+  total_quantity: number;
+  total_price: number;
+}
@@ -1,3 +1,4 @@
 export * from './product.types';
 export * from './user.types';
 export * from './api.types';
+export * from './cart.types';
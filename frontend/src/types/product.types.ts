@@ -6,13 +6,34 @@ export interface ProductImage {
   display_order: number;
 }
 
+// Image with resized copies keyed by width, for srcset
+export interface RenditionImage {
+  image_url: string;
+  alt_text?: string;
+  renditions: Record<string, string>;
+}
+
+export interface FeaturedProduct {
+  id: number;
+  name: string;
+  price: number;
+  image: RenditionImage | null;
+  secondaryImage: RenditionImage | null;
+}
+
+export interface FeaturedGroup {
+  group: string;
+  description?: string;
+  results: FeaturedProduct[];
+}
+
 export interface Product {
   id: number;
   name: string;
   price: number;
   image: string;  // Primary image URL
   secondaryImage?: string;  // Secondary image URL (back view)
-  category: string;
+  category: string | null;  // First category, if any
   description?: string;
   images?: ProductImage[];
 }